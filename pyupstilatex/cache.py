@@ -0,0 +1,124 @@
+"""Cache LRU borné, partagé entre threads.
+
+Sert aux caches de module du package (sondes et contenus des fichiers,
+versions détectées par le scan, métadonnées parsées) : l'éviction et le
+verrouillage sont les mêmes pour tous. Les caches indexés par l'état d'un
+fichier utilisent file_identity et is_settled.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+# Résolution des dates de fichiers la plus grossière rencontrée (FAT/exFAT :
+# 2 s, partages SMB : 1 à 2 s)
+_TIMESTAMP_RESOLUTION_NS = 2_000_000_000
+
+
+def file_identity(st: os.stat_result) -> Tuple[int, int, int, int, int]:
+    """Identité d'un fichier, pour les clés des caches indexés par fichier.
+
+    Paramètres
+    ----------
+    st : os.stat_result
+        Stat du fichier.
+
+    Retourne
+    --------
+    Tuple[int, int, int, int, int]
+        (périphérique, inode, date de modification, date de changement,
+        taille). La date de changement (ctime) est mise à jour à chaque
+        écriture, même si la date de modification est ensuite restaurée.
+    """
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_ctime_ns, st.st_size)
+
+
+def is_settled(st: os.stat_result) -> bool:
+    """Indique si un fichier est assez ancien pour être partagé via un cache.
+
+    Deux modifications de même taille faites dans la même unité de temps du
+    système de fichiers (jusqu'à 2 s) donnent la même file_identity : un
+    fichier modifié depuis moins longtemps ne doit pas être servi par un
+    cache partagé entre instances.
+
+    Paramètres
+    ----------
+    st : os.stat_result
+        Stat du fichier.
+
+    Retourne
+    --------
+    bool
+        True si la dernière modification du fichier est plus ancienne que la
+        résolution des dates de fichiers.
+    """
+    changed = max(st.st_mtime_ns, st.st_ctime_ns)
+    return time.time_ns() - changed > _TIMESTAMP_RESOLUTION_NS
+
+
+class LRUCache(Generic[V]):
+    """Cache LRU borné, protégé par un verrou.
+
+    Paramètres
+    ----------
+    maxsize : int
+        Taille maximale du cache : nombre d'entrées, ou somme des poids des
+        valeurs si weigh est donné.
+    weigh : Callable[[V], int], optional
+        Poids d'une valeur (ex: len pour des textes). Défaut : None (chaque
+        entrée compte pour 1).
+
+    Notes
+    -----
+    Les entrées les moins récemment utilisées sont évincées en premier. La
+    dernière entrée ajoutée est toujours gardée, même si son poids dépasse à
+    lui seul maxsize. Les valeurs None ne sont pas distinguées d'une absence.
+    """
+
+    __slots__ = ("maxsize", "_weigh", "_data", "_size", "_lock")
+
+    def __init__(self, maxsize: int, weigh: Optional[Callable[[V], int]] = None):
+        self.maxsize = maxsize
+        self._weigh = weigh
+        self._data: "OrderedDict[Hashable, V]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Retourne la valeur associée à key (None si absente).
+
+        Une entrée trouvée devient la plus récemment utilisée.
+        """
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        """Associe value à key, puis évince les entrées en trop."""
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._size -= self._weight(previous)
+            self._data[key] = value
+            self._size += self._weight(value)
+            while self._size > self.maxsize and len(self._data) > 1:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= self._weight(evicted)
+
+    def clear(self) -> None:
+        """Vide le cache."""
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _weight(self, value: V) -> int:
+        return 1 if self._weigh is None else self._weigh(value)
@@ -45,6 +45,7 @@ from __future__ import annotations
 
 import os
 import sys
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Iterable, Optional
@@ -143,6 +144,11 @@ def get_list(
 # TOML Configuration Loading
 # =========================
 
+# Last loaded configuration: (files stamp, os.environ after loading, AppConfig),
+# see load_config
+_CONFIG_CACHE: dict[str, tuple] = {}
+_CONFIG_CACHE_LOCK = threading.Lock()
+
 
 def _deep_merge(base: dict[str, Any], override: dict[str, Any]) -> dict[str, Any]:
     """Merge override dict into base dict recursively.
@@ -228,6 +234,27 @@ def _inject_toml_to_environ(toml_data: dict[str, Any]) -> None:
         os.environ[key] = value
 
 
+def _config_files() -> tuple[Path, Path, Path]:
+    """Return the paths of config.default.toml, custom/config.toml, custom/.env."""
+    package_dir = Path(__file__).resolve().parent
+    return (
+        package_dir / "config" / "config.default.toml",
+        package_dir.parent / "custom" / "config.toml",
+        package_dir.parent / "custom" / ".env",
+    )
+
+
+def _config_files_stamp() -> tuple[Optional[int], ...]:
+    """Modification time (ns) of each configuration file, None if missing."""
+    stamp = []
+    for path in _config_files():
+        try:
+            stamp.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
 def _load_config_from_toml() -> None:
     """Load TOML configuration files and inject into os.environ.
 
@@ -239,10 +266,7 @@ def _load_config_from_toml() -> None:
     Si custom/.env n'existe pas, les valeurs par défaut de config.py sont utilisées.
     """
     # Paths
-    package_dir = Path(__file__).resolve().parent
-    default_config_path = package_dir / "config" / "config.default.toml"
-    custom_config_path = package_dir.parent / "custom" / "config.toml"
-    custom_env_path = package_dir.parent / "custom" / ".env"
+    default_config_path, custom_config_path, custom_env_path = _config_files()
 
     # Load custom/.env for secrets FIRST (so they take priority over TOML)
     # Si le fichier n'existe pas, on utilise les valeurs par défaut de config.py
@@ -613,9 +637,23 @@ def load_config() -> AppConfig:
     custom/.env is ONLY for secrets (credentials, API keys).
     Si custom/.env n'existe pas, les valeurs par défaut sont utilisées.
     TOML values always take priority over .env for non-secret keys.
-    """
-    # Load TOML configuration and inject into os.environ
-    _load_config_from_toml()
 
-    # Build and return AppConfig from environment
-    return AppConfig.from_env()
+    The result is cached: as long as the configuration files are unchanged
+    and os.environ is exactly as the previous load left it, reloading would
+    produce the same AppConfig, so the cached one is returned.
+    """
+    stamp = _config_files_stamp()
+    with _CONFIG_CACHE_LOCK:
+        cached = _CONFIG_CACHE.get("config")
+        if cached is not None:
+            cached_stamp, cached_environ, cached_config = cached
+            if cached_stamp == stamp and cached_environ == os.environ:
+                return cached_config
+
+        # Load TOML configuration and inject into os.environ
+        _load_config_from_toml()
+
+        # Build and return AppConfig from environment
+        config = AppConfig.from_env()
+        _CONFIG_CACHE["config"] = (stamp, dict(os.environ), config)
+        return config
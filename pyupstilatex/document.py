@@ -1,5 +1,7 @@
+import copy
 import glob
 import inspect
+import os
 import shutil
 import time
 import zipfile
@@ -48,6 +50,10 @@ class UPSTILatexDocument:
         Si True, exige que le fichier soit modifiable
     msg : MessageHandler
         Gestionnaire de messages pour l'affichage console/log
+    dir_entry : os.DirEntry, optional
+        Entrée os.scandir du fichier, transmise à DocumentFile (évite un stat)
+    prefetched_stat : os.stat_result, optional
+        Stat du fichier déjà obtenu, transmis à DocumentFile
     """
 
     # === CHAMPS PUBLICS ===
@@ -55,6 +61,10 @@ class UPSTILatexDocument:
     strict: bool = False
     require_writable: bool = False
     msg: MessageHandler = field(default_factory=NoOpMessageHandler)
+    dir_entry: Optional[os.DirEntry] = field(default=None, repr=False, compare=False)
+    prefetched_stat: Optional[os.stat_result] = field(
+        default=None, repr=False, compare=False
+    )
 
     # === CHAMPS PRIVÉS (CACHE) ===
     _metadata: Optional[Dict] = field(default=None, init=False)
@@ -83,6 +93,8 @@ class UPSTILatexDocument:
             source=self.source,
             strict=self.strict,
             require_writable=self.require_writable,
+            dir_entry=self.dir_entry,
+            prefetched_stat=self.prefetched_stat,
         )
 
     # =========================================================================
@@ -235,6 +247,8 @@ class UPSTILatexDocument:
         strict: bool = False,
         require_writable: bool = False,
         msg: Optional[MessageHandler] = None,
+        dir_entry: Optional[os.DirEntry] = None,
+        prefetched_stat: Optional[os.stat_result] = None,
     ) -> tuple["UPSTILatexDocument", List[List[str]]]:
         errors: List[List[str]] = []
         try:
@@ -243,6 +257,8 @@ class UPSTILatexDocument:
                 strict=strict,
                 require_writable=require_writable,
                 msg=(msg or NoOpMessageHandler()),
+                dir_entry=dir_entry,
+                prefetched_stat=prefetched_stat,
             )
             return doc, errors
         except Exception as e:
@@ -647,6 +663,66 @@ class UPSTILatexDocument:
                 ]
             ]
 
+    def set_metadata_many(self, items: Dict[str, Any]) -> Tuple[bool, List[List[str]]]:
+        """Ajoute ou modifie plusieurs métadonnées en une seule écriture du fichier.
+
+        Chaque métadonnée est traitée comme par set_metadata, mais les
+        écritures intermédiaires restent en mémoire (voir
+        DocumentFile.defer_writes) : le fichier n'est écrit qu'à la fin.
+
+        Paramètres
+        ----------
+        items : Dict[str, Any]
+            Métadonnées à ajouter ou modifier ({clé: valeur}).
+
+        Retourne
+        --------
+        Tuple[bool, List[List[str]]]
+            (success, messages) où success indique si toutes les métadonnées
+            ont été enregistrées, et messages regroupe les infos/erreurs.
+
+        Exemples
+        --------
+        >>> doc.set_metadata_many({"titre": "Mon titre", "auteur": "Moi"})
+        """
+        success = True
+        messages: List[List[str]] = []
+        saved_keys: List[str] = []
+
+        self.file.defer_writes()
+        try:
+            for key, value in items.items():
+                result = self.set_metadata(key, value)
+                if not result:
+                    # Aucun des deux handlers n'a pu enregistrer la métadonnée
+                    success = False
+                    messages.append(
+                        [f"Impossible d'enregistrer la métadonnée '{key}'.", "error"]
+                    )
+                    continue
+                key_success, key_messages = result
+                success = success and key_success
+                messages.extend(key_messages)
+                if key_success:
+                    saved_keys.append(key)
+        finally:
+            write_success, write_messages = self.file.flush()
+
+        if not write_success:
+            # Rien n'a été écrit : oublier les métadonnées mises à jour en
+            # mémoire par les handlers (le fichier est relu, voir flush), et
+            # remplacer les messages des métadonnées enregistrées par un seul
+            # échec (seules les erreurs sont gardées)
+            self._metadata = None
+            messages = [m for m in messages if m[1] == "error"]
+            if saved_keys:
+                unsaved = ", ".join(f"'{key}'" for key in saved_keys)
+                messages.insert(
+                    0, [f"Métadonnées non enregistrées : {unsaved}.", "error"]
+                )
+
+        return success and write_success, messages + write_messages
+
     def delete_metadata(self, key: str) -> Tuple[bool, List[List[str]]]:
         """Supprime une métadonnée existante.
 
@@ -1522,6 +1598,8 @@ class UPSTILatexDocument:
         # === 9. Mise à jour de l'objet Document pour pointer vers le nouveau chemin ===
         try:
             self.source = str(nouveau_chemin)
+            self.dir_entry = None
+            self.prefetched_stat = None
             self._file = DocumentFile(
                 source=self.source,
                 strict=self.strict,
@@ -2861,6 +2939,8 @@ class UPSTILatexDocument:
         instance.strict = strict
         instance.require_writable = require_writable
         instance.msg = msg or NoOpMessageHandler()
+        instance.dir_entry = None
+        instance.prefetched_stat = None
         instance._metadata = None
         instance._compilation_parameters = None
         instance._version = version
@@ -2945,44 +3025,61 @@ class UPSTILatexDocument:
                 * "EPB_Cours" : ancien package EPB_Cours détecté
                 * None : aucun package reconnu
         """
-        version: Dict[str, Optional[int | str]] = {}
-
         try:
-            content = self.content
-            packages = parse_package_imports(content)
-
-            # === Détection de la version de pyUPSTIlatex ===
-
-            # v2 : présence du marqueur de métadonnées YAML dans les commentaires
-            for line in content.splitlines():
-                stripped = line.strip()
-                if not stripped:
-                    continue
-                if stripped.startswith("%") and not stripped.startswith("%%"):
-                    if "%### BEGIN metadonnees_yaml ###" in stripped:
-                        version["pyupstilatex"] = 2
-                        break
-
-            # v1 / None : si pas de marqueur YAML
-            if "pyupstilatex" not in version:
-                version["pyupstilatex"] = 1 if "UPSTI_Document" in packages else None
-
-            # === Détection du package LaTeX utilisé ===
-
-            if "upsti-latex" in packages:
-                version["latex"] = "upsti-latex"
-            elif "UPSTI_Document" in packages:
-                version["latex"] = "UPSTI_Document"
-            elif "EPB_Cours" in packages:
-                version["latex"] = "EPB_Cours"
-            else:
-                version["latex"] = None
-
+            # En-tête seul d'abord : un document upsti-latex v2 (marqueur YAML
+            # et package dans les premiers Kio) est reconnu sans lire la suite.
+            # Aucune autre combinaison n'est définitive sur un extrait.
+            header, complete = self.file.read_header()
+            if complete:
+                return self._version_from_content(header), []
+            version = self._version_from_content(header)
+            if version == {"pyupstilatex": 2, "latex": "upsti-latex"}:
+                return version, []
+
+            version = self._version_from_content(self.content)
         except Exception as e:
             return None, [[f"Impossible de lire le fichier: {e}", "error"]]
 
         return version, []
 
+    @staticmethod
+    def _version_from_content(content: str) -> Dict[str, Optional[int | str]]:
+        """Détermine la version à partir d'un contenu LaTeX (méthode interne).
+
+        Voir _detect_version pour la signification des valeurs.
+        """
+        version: Dict[str, Optional[int | str]] = {}
+        packages = parse_package_imports(content)
+
+        # === Détection de la version de pyUPSTIlatex ===
+
+        # v2 : présence du marqueur de métadonnées YAML dans les commentaires
+        for line in content.splitlines():
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if stripped.startswith("%") and not stripped.startswith("%%"):
+                if "%### BEGIN metadonnees_yaml ###" in stripped:
+                    version["pyupstilatex"] = 2
+                    break
+
+        # v1 / None : si pas de marqueur YAML
+        if "pyupstilatex" not in version:
+            version["pyupstilatex"] = 1 if "UPSTI_Document" in packages else None
+
+        # === Détection du package LaTeX utilisé ===
+
+        if "upsti-latex" in packages:
+            version["latex"] = "upsti-latex"
+        elif "UPSTI_Document" in packages:
+            version["latex"] = "UPSTI_Document"
+        elif "EPB_Cours" in packages:
+            version["latex"] = "EPB_Cours"
+        else:
+            version["latex"] = None
+
+        return version
+
     def _get_default_metadata(self) -> Tuple[Dict, List[List[str]]]:
         """Retourne les métadonnées par défaut (méthode interne).
 
@@ -3044,7 +3141,8 @@ class UPSTILatexDocument:
                 "initiales": "",
                 "raw_value": data.get(key, "") if data else "",
                 "initial_value": data.get(key, "") if data else "",
-                "parametres": params,
+                # Copie : la configuration JSON est partagée (read_json_config)
+                "parametres": copy.deepcopy(params),
                 **(
                     {"type_meta": "default"}
                     if params.get("default") and key not in data
@@ -1,7 +1,13 @@
+import errno
 import fnmatch
+import functools
 import json
 import os
+import re
 import shutil
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
@@ -9,6 +15,7 @@ from typing import Dict, List, Optional, Tuple, Union
 from jinja2 import ChoiceLoader, Environment, FileSystemLoader, select_autoescape
 
 from .accessibilite import VERSIONS_ACCESSIBLES_DISPONIBLES
+from .cache import LRUCache, file_identity, is_settled
 from .config import load_config
 
 JSON_CONFIG_PATH = Path(__file__).resolve().parent / "config" / "pyUPSTIlatex.json"
@@ -16,6 +23,21 @@ JSON_CUSTOM_CONFIG_PATH = (
     Path(__file__).resolve().parent.parent / "custom" / "pyUPSTIlatex.json"
 )
 
+# Configurations JSON déjà lues : chemin -> (identités des fichiers, data,
+# messages). Une entrée est remplacée dès que l'un des fichiers change (voir
+# file_identity) ; un fichier modifié trop récemment n'est pas mis en cache
+# (voir is_settled)
+_JSON_CONFIG_CACHE: Dict[str, tuple] = {}
+_JSON_CONFIG_CACHE_LOCK = threading.Lock()
+
+
+def _stat_or_none(path: Path) -> Optional[os.stat_result]:
+    """Stat d'un fichier, ou None s'il est absent ou inaccessible."""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
 
 def read_json_config(
     path: Optional[Path | str] = None,
@@ -25,6 +47,65 @@ def read_json_config(
     Charge le fichier JSON principal, puis applique les modifications du
     fichier custom si présent (sections 'remove' et 'create_or_modify').
 
+    Le résultat est mis en cache tant que les fichiers JSON ne changent pas
+    (voir cache.file_identity et cache.is_settled) : les appels répétés ne
+    relisent ni ne reparsent rien. Le dictionnaire renvoyé est partagé entre
+    les appels et ne doit donc pas être modifié : ce qui en sort du package
+    (ex: les paramètres des métadonnées) est copié.
+
+    Paramètres
+    ----------
+    path : Optional[Path | str], optional
+        Chemin vers le fichier JSON à lire. Si None, utilise le chemin par
+        défaut (pyUPSTIlatex.json). Défaut : None.
+
+    Retourne
+    --------
+    tuple[Optional[dict], List[List[str]]]
+        Tuple (data, messages) où :
+        - data : dictionnaire de configuration (ou None en cas d'erreur)
+        - messages : liste de [message, flag] pour erreurs/avertissements
+    """
+    json_path = JSON_CONFIG_PATH if path is None else Path(path)
+    main_st = _stat_or_none(json_path)
+    if main_st is None:
+        # Fichier absent : message d'erreur habituel, rien à mettre en cache
+        return _read_json_config_uncached(path)
+    custom_st = _stat_or_none(JSON_CUSTOM_CONFIG_PATH) if path is None else None
+
+    # Fichier modifié trop récemment : son identité ne suffit pas à détecter
+    # une nouvelle modification, pas de cache
+    if not is_settled(main_st) or (custom_st is not None and not is_settled(custom_st)):
+        return _read_json_config_uncached(path)
+
+    stamp = (
+        file_identity(main_st),
+        file_identity(custom_st) if custom_st is not None else None,
+    )
+    cache_key = str(json_path)
+    with _JSON_CONFIG_CACHE_LOCK:
+        cached = _JSON_CONFIG_CACHE.get(cache_key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1], [list(m) for m in cached[2]]
+
+    data, messages = _read_json_config_uncached(path)
+    if data is not None:
+        with _JSON_CONFIG_CACHE_LOCK:
+            _JSON_CONFIG_CACHE[cache_key] = (
+                stamp,
+                data,
+                [list(m) for m in messages],
+            )
+    return data, messages
+
+
+def _read_json_config_uncached(
+    path: Optional[Path | str] = None,
+) -> tuple[Optional[dict], List[List[str]]]:
+    """Lit et fusionne les fichiers JSON de configuration (fonction interne).
+
+    Voir read_json_config, qui met ce résultat en cache.
+
     Paramètres
     ----------
     path : Optional[Path | str], optional
@@ -107,6 +188,218 @@ def read_json_config(
         return None, [[msg, "error"]]
 
 
+# Versions détectées par scan_for_documents, partagées par tout le processus.
+# La clé (chemin, identité du fichier) change dès que le fichier est modifié :
+# un nouveau scan d'un fichier inchangé ne relit pas son contenu. Les fichiers
+# modifiés trop récemment (voir is_settled) ne passent pas par le cache.
+_SCAN_VERSION_CACHE: "LRUCache[tuple]" = LRUCache(4096)
+
+# Analyse parallèle des fichiers scannés, à partir de 8 fichiers
+_SCAN_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+_SCAN_PARALLEL_MIN_FILES = 8
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_excludes(patterns: Tuple[str, ...]) -> Optional["re.Pattern[str]"]:
+    """Compile les motifs d'exclusion en une seule expression (fonction interne).
+
+    Même sémantique que fnmatch.fnmatch, y compris os.path.normcase. Le
+    résultat est mis en cache : les appels répétés de scan_for_documents avec
+    les mêmes motifs ne recompilent rien.
+
+    Paramètres
+    ----------
+    patterns : Tuple[str, ...]
+        Motifs glob (tuple, pour pouvoir servir de clé de cache).
+
+    Retourne
+    --------
+    re.Pattern, optional
+        Expression compilée, ou None s'il n'y a aucun motif.
+    """
+    if not patterns:
+        return None
+    return re.compile(
+        "|".join(
+            f"(?:{fnmatch.translate(os.path.normcase(pat))})" for pat in patterns
+        )
+    )
+
+
+def _scan_tex_entries(root: str) -> List[Tuple[os.DirEntry, str]]:
+    """Liste les fichiers .tex puis .ltx d'une arborescence (fonction interne).
+
+    Un seul parcours avec os.scandir : le type de chaque entrée vient du
+    dossier lui-même, sans stat par fichier. L'ordre est celui de
+    rglob("*.tex") suivi de rglob("*.ltx") (dossier courant, puis chaque
+    sous-dossier en profondeur) ; la casse de l'extension suit les règles du
+    système (os.path.normcase) et les liens symboliques vers des dossiers ne
+    sont pas suivis. Les dossiers illisibles sont ignorés.
+
+    Paramètres
+    ----------
+    root : str
+        Dossier racine du parcours.
+
+    Retourne
+    --------
+    List[Tuple[os.DirEntry, str]]
+        Entrées des fichiers trouvés, avec leur chemin relatif à root.
+    """
+    tex_entries: List[Tuple[os.DirEntry, str]] = []
+    ltx_entries: List[Tuple[os.DirEntry, str]] = []
+    stack = [(root, "")]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel = rel_dir + entry.name
+            name = os.path.normcase(entry.name)
+            is_tex = name.endswith(".tex")
+            if is_tex or name.endswith(".ltx"):
+                try:
+                    is_file = entry.is_file()
+                except OSError:
+                    is_file = False
+                if is_file:
+                    (tex_entries if is_tex else ltx_entries).append((entry, rel))
+                    continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((entry.path, rel + os.sep))
+            except OSError:
+                pass
+        # Pile : le premier sous-dossier doit être parcouru en premier
+        stack.extend(reversed(subdirs))
+
+    return tex_entries + ltx_entries
+
+
+def _scan_document_entry(
+    entry: os.DirEntry,
+    real_path: str,
+) -> Tuple[Optional[Dict[str, str]], List[List[str]]]:
+    """Analyse un fichier trouvé par scan_for_documents (fonction interne).
+
+    Indépendante des autres fichiers : peut être exécutée dans un thread.
+
+    Paramètres
+    ----------
+    entry : os.DirEntry
+        Entrée du fichier, issue de _scan_tex_entries.
+    real_path : str
+        Chemin absolu résolu du fichier (clé 'path' de l'entrée du document).
+
+    Retourne
+    --------
+    tuple[Optional[Dict[str, str]], List[List[str]]]
+        (doc_entry, messages) : l'entrée du document pour scan_for_documents,
+        ou None si le fichier est écarté (illisible, ignoré, erreur).
+    """
+    # Import ici pour éviter l'import circulaire
+    from .document import UPSTILatexDocument
+
+    messages: List[List[str]] = []
+    file_path = entry.path
+
+    # Un seul stat (gratuit sous Windows) : il sert à la sonde du fichier et
+    # à la clé du cache des versions
+    try:
+        st = entry.stat()
+    except OSError:
+        st = None
+
+    # Initialiser le document
+    doc, doc_errors = UPSTILatexDocument.from_path(
+        file_path, dir_entry=entry, prefetched_stat=st
+    )
+    if doc_errors:
+        for derr in doc_errors:
+            messages.append(
+                [
+                    f"Erreur lors de la lecture de {file_path}: {derr[0]}",
+                    derr[1],
+                ]
+            )
+        return None, messages
+    if doc is None:
+        messages.append([f"Impossible d'initialiser le document: {file_path}", "error"])
+        return None, messages
+
+    # Vérifier la lisibilité
+    if not doc.is_readable:
+        reason = doc.readable_reason or "Raison inconnue"
+        flag = doc.readable_flag or "error"
+        messages.append([f"Fichier illisible ({file_path}): {reason}", flag])
+        return None, messages
+
+    # Vérifier si le fichier doit être ignoré (paramètre ignore=True)
+    try:
+        params, _ = doc.get_compilation_parameters()
+        if params and params.get("ignore", False):
+            return None, messages
+    except Exception:
+        # En cas d'erreur, on ne filtre pas le fichier
+        pass
+
+    # Détection de la version (en cache tant que le fichier ne change
+    # pas ; les paramètres de compilation, qui dépendent aussi de la
+    # configuration et du fichier YAML local, sont toujours relus)
+    version_key = (file_path, *file_identity(st)) if st and is_settled(st) else None
+    cached = _SCAN_VERSION_CACHE.get(version_key) if version_key else None
+    if cached is not None:
+        version, version_errors = cached
+    else:
+        version, version_errors = doc.get_version()
+        if version_key is not None:
+            _SCAN_VERSION_CACHE.put(version_key, (version, version_errors))
+    if version_errors:
+        for verr in version_errors:
+            messages.append([f"{file_path}: {verr[0]}", verr[1]])
+
+    # Déterminer la compatibilité
+    compatible = version.get("pyupstilatex") is not None and version.get(
+        "latex"
+    ) in {
+        "upsti-latex",
+        "UPSTI_Document",
+        "EPB_Cours",
+    }
+
+    # Préparer l'entrée du document
+    doc_entry = {
+        "name": os.path.splitext(entry.name)[0],
+        "filename": entry.name,
+        "path": real_path,
+        "version_pyupstilatex": version.get("pyupstilatex", "inconnue"),
+        "version_latex": version.get("latex", "inconnue"),
+        "compatible": compatible,
+    }
+
+    # Récupérer le paramètre de compilation pour les documents compatibles
+    if compatible:
+        # Les documents EPB_Cours ont toujours a_compiler = False
+        if version.get("latex") == "EPB_Cours":
+            a_compiler = False
+        else:
+            a_compiler = False
+            try:
+                params, _ = doc.get_compilation_parameters()
+                if params:
+                    a_compiler = bool(params.get("compiler", False))
+            except Exception:
+                pass
+        doc_entry["a_compiler"] = a_compiler
+
+    return doc_entry, messages
+
+
 def scan_for_documents(
     root_paths: Optional[Union[str, List[str]]] = None,
     exclude_patterns: Optional[List[str]] = None,
@@ -156,11 +449,9 @@ def scan_for_documents(
             - 'a_compiler' : bool (seulement si compatible)
         - messages : liste de [message, flag] générés durant le scan
     """
-    # Import ici pour éviter l'import circulaire
-    from .document import UPSTILatexDocument
-
     messages: List[List[str]] = []
-    cfg = load_config()
+    # Configuration chargée seulement si l'appelant ne fournit pas tout
+    cfg = load_config() if root_paths is None or exclude_patterns is None else None
 
     # Normalisation du mode de filtrage
     if filter_mode not in ("compatible", "incompatible", "all"):
@@ -188,7 +479,7 @@ def scan_for_documents(
 
     if exclude_patterns is None:
         exclude_patterns = list(cfg.traitement_par_lot.fichiers_a_exclure)
-    exclude_patterns = exclude_patterns or []
+    exclude_re = _compile_excludes(tuple(exclude_patterns or ()))
 
     all_documents: List[Dict[str, str]] = []
 
@@ -197,101 +488,42 @@ def scan_for_documents(
             messages.append([f"Le dossier spécifié n'existe pas : {root}", "warning"])
             continue
 
-        p = Path(root)
-        tex_files = list(p.rglob("*.tex")) + list(p.rglob("*.ltx"))
-
-        for file_path in tex_files:
+        # Racine résolue une seule fois : les dossiers parcourus ne sont
+        # jamais des liens symboliques (non suivis), seul un fichier lien
+        # demande une résolution complète
+        root_real = os.path.realpath(root)
+        selected_entries = []
+        real_paths = []
+        for entry, rel_str in _scan_tex_entries(str(Path(root))):
             # Appliquer les motifs d'exclusion
-            rel = None
-            try:
-                rel = file_path.relative_to(p)
-            except Exception:
-                rel = file_path.name
-            rel_str = str(rel)
-            should_exclude = False
-            for pat in exclude_patterns:
-                if fnmatch.fnmatch(file_path.name, pat) or fnmatch.fnmatch(
-                    rel_str, pat
-                ):
-                    should_exclude = True
-                    break
-            if should_exclude:
-                continue
-
-            # Initialiser le document
-            doc, doc_errors = UPSTILatexDocument.from_path(str(file_path))
-            if doc_errors:
-                for derr in doc_errors:
-                    messages.append(
-                        [
-                            f"Erreur lors de la lecture de {file_path}: {derr[0]}",
-                            derr[1],
-                        ]
-                    )
-                continue
-            if doc is None:
-                messages.append(
-                    [f"Impossible d'initialiser le document: {file_path}", "error"]
-                )
-                continue
-
-            # Vérifier la lisibilité
-            if not doc.is_readable:
-                reason = doc.readable_reason or "Raison inconnue"
-                flag = doc.readable_flag or "error"
-                messages.append([f"Fichier illisible ({file_path}): {reason}", flag])
+            if exclude_re is not None and (
+                exclude_re.match(os.path.normcase(entry.name))
+                or exclude_re.match(os.path.normcase(rel_str))
+            ):
                 continue
-
-            # Vérifier si le fichier doit être ignoré (paramètre ignore=True)
+            selected_entries.append(entry)
             try:
-                params, _ = doc.get_compilation_parameters()
-                if params and params.get("ignore", False):
-                    continue
-            except Exception:
-                # En cas d'erreur, on ne filtre pas le fichier
-                pass
-
-            # Détection de la version
-            version, version_errors = doc.get_version()
-            if version_errors:
-                for verr in version_errors:
-                    messages.append([f"{file_path}: {verr[0]}", verr[1]])
-
-            # Déterminer la compatibilité
-            compatible = version.get("pyupstilatex") is not None and version.get(
-                "latex"
-            ) in {
-                "upsti-latex",
-                "UPSTI_Document",
-                "EPB_Cours",
-            }
-
-            # Préparer l'entrée du document
-            doc_entry = {
-                "name": file_path.stem,
-                "filename": file_path.name,
-                "path": str(file_path.resolve()),
-                "version_pyupstilatex": version.get("pyupstilatex", "inconnue"),
-                "version_latex": version.get("latex", "inconnue"),
-                "compatible": compatible,
-            }
-
-            # Récupérer le paramètre de compilation pour les documents compatibles
-            if compatible:
-                # Les documents EPB_Cours ont toujours a_compiler = False
-                if version.get("latex") == "EPB_Cours":
-                    a_compiler = False
-                else:
-                    a_compiler = False
-                    try:
-                        params, _ = doc.get_compilation_parameters()
-                        if params:
-                            a_compiler = bool(params.get("compiler", False))
-                    except Exception:
-                        pass
-                doc_entry["a_compiler"] = a_compiler
+                is_symlink = entry.is_symlink()
+            except OSError:
+                is_symlink = True
+            if is_symlink:
+                real_paths.append(os.path.realpath(entry.path))
+            else:
+                real_paths.append(os.path.normpath(os.path.join(root_real, rel_str)))
 
-            all_documents.append(doc_entry)
+        # Analyser les fichiers en parallèle (sondes, lectures et analyses
+        # indépendantes) ; les résultats sont regroupés dans l'ordre du parcours
+        if len(selected_entries) < _SCAN_PARALLEL_MIN_FILES:
+            results = map(_scan_document_entry, selected_entries, real_paths)
+        else:
+            with ThreadPoolExecutor(max_workers=_SCAN_MAX_WORKERS) as executor:
+                results = list(
+                    executor.map(_scan_document_entry, selected_entries, real_paths)
+                )
+        for doc_entry, doc_messages in results:
+            messages.extend(doc_messages)
+            if doc_entry is not None:
+                all_documents.append(doc_entry)
 
     # Filtrer selon le mode demandé (compatible/incompatible/all)
     if filter_mode == "compatible":
@@ -1746,8 +1978,9 @@ def check_path_readable(path: str) -> Tuple[bool, Optional[str], Optional[str]]:
 def check_path_writable(path: str) -> Tuple[bool, Optional[str], Optional[str]]:
     """Vérifie l'accessibilité en écriture d'un fichier existant.
 
-    Teste si le fichier existe et peut être ouvert en mode écriture.
-    N'essaie PAS de créer le fichier s'il n'existe pas.
+    Teste si le fichier existe et peut être modifié, sans l'ouvrir : un stat
+    puis os.access(path, os.W_OK). N'essaie PAS de créer le fichier s'il
+    n'existe pas.
 
     Paramètres
     ----------
@@ -1770,20 +2003,17 @@ def check_path_writable(path: str) -> Tuple[bool, Optional[str], Optional[str]]:
     >>> check_path_writable("/chemin/readonly.txt")
     (False, "Permission refusée: ...", "fatal_error")
     """
-    p = Path(path)
-    if not p.exists():
-        return False, "Fichier introuvable", "fatal_error"
-    if not p.is_file():
-        return False, "N'est pas un fichier", "fatal_error"
     try:
-        # 'r+b' requiert que le fichier existe et autorise l'écriture sans le
-        # tronquer
-        with p.open("r+b") as _:
-            pass
-    except PermissionError as e:
-        return False, f"Permission refusée: {e}", "fatal_error"
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return False, "Fichier introuvable", "fatal_error"
     except Exception as e:
         return False, f"Impossible d'ouvrir en écriture: {e}", "fatal_error"
+    if stat.S_ISDIR(st.st_mode):
+        return False, "N'est pas un fichier", "fatal_error"
+    if not os.access(path, os.W_OK):
+        e = PermissionError(errno.EACCES, os.strerror(errno.EACCES), path)
+        return False, f"Permission refusée: {e}", "fatal_error"
     return True, None, None
 
 
@@ -1807,15 +2037,27 @@ def add_display_paths(documents: list[dict[str, str]]) -> list[dict[str, str]]:
     if not documents:
         return documents
 
-    # Extraire tous les chemins
-    paths = [d["path"] for d in documents]
+    # Découper une seule fois chaque chemin en composants ; la comparaison se
+    # fait sur la forme normalisée (casse ignorée sous Windows), comme
+    # os.path.commonpath, sans os.path.relpath par document
+    sep = os.sep
+    altsep = os.altsep
+    parts_list = [
+        (d["path"].replace(altsep, sep) if altsep else d["path"]).split(sep)
+        for d in documents
+    ]
+    norm_parts_list = [os.path.normcase(d["path"]).split(sep) for d in documents]
 
-    # Trouver le chemin commun
-    common = os.path.commonpath(paths)
+    # Nombre de composants communs à tous les chemins
+    n_common = 0
+    for group in zip(*norm_parts_list):
+        if any(part != group[0] for part in group):
+            break
+        n_common += 1
 
     # Ajouter display_path
-    for d in documents:
-        d["display_path"] = os.path.relpath(d["path"], common)
+    for d, parts in zip(documents, parts_list):
+        d["display_path"] = sep.join(parts[n_common:]) or "."
 
     return documents
 
@@ -1924,17 +2166,20 @@ def _add_truncated_paths(documents: List[Dict[str, str]], max_length: int = 88)
                 max_length - len(first_part) - len(last_part) - 4
             )  # -4 pour "\...\\"
             if available > 0:
-                # Ajouter des dossiers depuis la fin vers l'avant
+                # Ajouter des dossiers depuis la fin vers l'avant : seule la
+                # longueur cumulée est suivie, la chaîne est construite une fois
                 middle_parts = parts[1:-1]
-                middle_str = ""
+                limit = available - 3  # -3 pour "..."
+                cum_len = 0
+                start = len(middle_parts)
                 for i in range(len(middle_parts) - 1, -1, -1):
-                    test_str = f"{middle_parts[i]}\\" + middle_str
-                    if len(test_str) <= available - 3:  # -3 pour "..."
-                        middle_str = test_str
-                    else:
+                    cum_len += len(middle_parts[i]) + 1  # +1 pour "\\"
+                    if cum_len > limit:
                         break
+                    start = i
 
-                if middle_str:
-                    truncated = f"{first_part}\\...\\{middle_str}{last_part}"
+                if start < len(middle_parts):
+                    middle_str = "\\".join(middle_parts[start:])
+                    truncated = f"{first_part}\\...\\{middle_str}\\{last_part}"
 
         doc["display_path"] = truncated
@@ -1,10 +1,38 @@
+import re
 from typing import Any, Dict, List, Optional, Tuple
 
-import regex as re
 import yaml
 
 from .config import load_config
 from .file_helpers import read_json_config
+from .yaml_compat import YamlLoader
+
+# Valeurs TeX interprétées comme booléen vrai (ex: \newcommand{\UPSTIxxx}{1})
+_TEX_TRUTHY = frozenset({"1", "true", "True", "yes", "on"})
+
+# Déclarations de commandes : une seule alternative ordonnée, compilée une fois.
+# Le préfixe paresseux `.*?` garantit que \newcommand / \renewcommand (et
+# variantes) restent prioritaires sur \def, quelle que soit leur position.
+_RE_COMMAND_DECLARATION = re.compile(
+    r".*?(?:"
+    r"\\(?P<decl>(?:new|renew)commandx?\*?)\s*"
+    r"\{\\(?P<name>[A-Za-z@]+)\}"
+    r"(?:\[(?P<args>\d+)\])?"  # nb d’args
+    r"(?:\[(?P<opt_spec>[^\]]*)\])?"  # spec optionnelle (newcommandx)
+    r"\{"
+    r")|.*?(?:"
+    r"\\(?P<def_decl>[egx]?def)\s*\\(?P<def_name>[A-Za-z@]+)"
+    r"(?P<sig>(?:#\d+)*)\s*\{"
+    r")"
+)
+_RE_COMMAND_CALL = re.compile(r"\\(?P<name>[A-Za-z@]+)")
+_RE_PACKAGE_NAMES = re.compile(
+    r"\\(?:usepackage|RequirePackage)\s*(?:\[[^\]]*\])?\s*\{([^}]*)\}"
+)
+_RE_PACKAGE_IMPORT = re.compile(
+    r"\\(?P<decl>usepackage|RequirePackage)\s*(?:\[(?P<opts>[^]]*)\])?\s*"
+    r"\{(?P<name>[^}]*)\}"
+)
 
 
 def parse_metadata_yaml(text: str) -> Tuple[Dict[str, Any], List[List[str]]]:
@@ -36,38 +64,39 @@ def parse_metadata_yaml(text: str) -> Tuple[Dict[str, Any], List[List[str]]]:
     if not block:
         return {}, errors
 
-    # Prétraiter le bloc YAML : remplacer les tabulations et supprimer
-    # les commentaires en fin de ligne (hors chaînes entre guillemets)
-    def _strip_yaml_inline_comments(s: str) -> str:
+    # Prétraiter le bloc YAML en une seule passe : remplacer les tabulations
+    # (YAML interdit les tabs pour l'indentation) et supprimer les commentaires
+    # en fin de ligne (hors chaînes entre guillemets)
+    def _clean_yaml_block(s: str, tabsize: int = 4) -> str:
         out_lines: List[str] = []
         for line in s.splitlines():
             buf: List[str] = []
+            col = 0
             in_single = False
             in_double = False
-            i = 0
-            while i < len(line):
-                ch = line[i]
+            for ch in line:
+                if ch == "\t":
+                    # Même résultat que str.expandtabs(tabsize)
+                    n_spaces = tabsize - (col % tabsize)
+                    buf.append(" " * n_spaces)
+                    col += n_spaces
+                    continue
                 if ch == "'" and not in_double:
                     in_single = not in_single
-                    buf.append(ch)
                 elif ch == '"' and not in_single:
                     in_double = not in_double
-                    buf.append(ch)
                 elif ch == "#" and not in_single and not in_double:
                     # début d'un commentaire en fin de ligne -> arrêter
                     break
-                else:
-                    buf.append(ch)
-                i += 1
+                buf.append(ch)
+                col += 1
             out_lines.append(''.join(buf).rstrip())
         return "\n".join(out_lines)
 
-    # Convertir tabulations en espaces (YAML interdit les tabs pour l'indentation)
-    block = block.expandtabs(4)
-    block_clean = _strip_yaml_inline_comments(block)
+    block_clean = _clean_yaml_block(block)
 
     try:
-        data = yaml.safe_load(block_clean) or {}
+        data = yaml.load(block_clean, Loader=YamlLoader) or {}
         if not isinstance(data, dict):
             errors.append(
                 [
@@ -121,6 +150,20 @@ def parse_metadata_tex(
     result: Dict[str, Any] = {}
     errors: List[List[str]] = []
 
+    # Index inverse id_upsti_document -> clé, construit une fois par section
+    id_indexes: Dict[str, Dict[Any, str]] = {}
+
+    def _get_id_index(section_key: str, mapping: Dict[str, Any]) -> Dict[Any, str]:
+        index = id_indexes.get(section_key)
+        if index is None:
+            index = {}
+            for k, obj in mapping.items():
+                if isinstance(obj, dict) and "id_upsti_document" in obj:
+                    # Conserver la première clé rencontrée pour un même id
+                    index.setdefault(obj["id_upsti_document"], k)
+            id_indexes[section_key] = index
+        return index
+
     def _resolve_rel_value(section_key: str, raw: Any, tex_key: str) -> Optional[str]:
         """
         Résout la valeur relationnelle en renvoyant la clé du mapping
@@ -140,10 +183,9 @@ def parse_metadata_tex(
         except Exception:
             raw_int = None
 
-        for k, obj in mapping.items():
-            if not isinstance(obj, dict):
-                continue
-            if raw_int is not None and obj.get("id_upsti_document") == raw_int:
+        if raw_int is not None:
+            k = _get_id_index(section_key, mapping).get(raw_int)
+            if k is not None:
                 return k, True
 
         return f"\\{tex_key} = {raw}", False
@@ -166,10 +208,8 @@ def parse_metadata_tex(
             valeur = parsed.get("value")
 
             if "bool" in params.get("accepted_types", []):
-                if str(valeur).strip() in ("1", "true", "True", "yes", "on"):
-                    valeur = True
-                else:
-                    valeur = None
+                s = valeur if isinstance(valeur, str) else str(valeur)
+                valeur = True if s.strip() in _TEX_TRUTHY else None
 
             if params.get("join_key"):
                 custom_tex_keys = params.get("custom_tex_keys")
@@ -256,7 +296,7 @@ def parse_metadata_tex(
                     if code:
                         competences.append(code)
 
-            competences = sorted(set(competences))
+            competences = sorted(dict.fromkeys(competences))
             if competences:
                 result[key] = {"FILIERE_TO_FIND": competences}
 
@@ -285,10 +325,7 @@ def parse_metadata_tex(
                 filiere = None
             classe = classe.get("nom", default_classe)
 
-        cfg, cfg_errors = read_json_config()
-        if cfg_errors:
-            errors.extend(cfg_errors)
-        cfg = cfg or {}
+        # Réutiliser la configuration JSON déjà chargée en début de fonction
         classe_cfg = cfg.get("classe") or {}
         filiere_cfg = cfg.get("filiere") or {}
 
@@ -349,6 +386,7 @@ def read_tex_zone(
         r"(.*?)"  # contenu capturé
         rf"^%### END {re.escape(zone_name)} ### *$"  # ligne END stricte
     )
+
     match = re.search(pattern, text, flags=re.DOTALL | re.MULTILINE)
     if not match:
         return None
@@ -356,15 +394,56 @@ def read_tex_zone(
     content = match.group(1).rstrip("\n")
 
     if remove_comment_char:
-        cleaned_lines = []
-        for line in content.splitlines():
-            # Supprime un seul '%' en début de ligne, et l'espace qui suit s'il existe
-            cleaned_lines.append(re.sub(r"^% ?", "", line))
-        return "\n".join(cleaned_lines).rstrip("\n")
+        return remove_comment_chars(content)
 
     return content
 
 
+def remove_comment_chars(zone_content: str) -> str:
+    """Retire le '%' de début de ligne du contenu brut d'une zone.
+
+    Même résultat que read_tex_zone(..., remove_comment_char=True) à partir
+    de read_tex_zone(...) : évite de rechercher deux fois la zone quand les
+    deux formes sont utiles.
+
+    Paramètres
+    ----------
+    zone_content : str
+        Contenu brut de la zone (tel que renvoyé par read_tex_zone).
+
+    Retourne
+    --------
+    str
+        Contenu sans le '%' (ni l'espace qui le suit) en début de ligne.
+    """
+    cleaned_lines = [strip_comment_char(line) for line in zone_content.splitlines()]
+    return "\n".join(cleaned_lines).rstrip("\n")
+
+
+def strip_comment_char(line: str) -> str:
+    """Retire le '%' de début d'une ligne de zone, et l'espace qui le suit.
+
+    Un seul '%' est retiré : c'est le nettoyage appliqué à chaque ligne par
+    read_tex_zone(..., remove_comment_char=True).
+
+    Paramètres
+    ----------
+    line : str
+        Ligne de la zone (avec ou sans fin de ligne).
+
+    Retourne
+    --------
+    str
+        Ligne sans le '%' ni l'espace qui le suit, inchangée si elle ne
+        commence pas par '%'.
+    """
+    if line.startswith("% "):
+        return line[2:]
+    if line.startswith("%"):
+        return line[1:]
+    return line
+
+
 def write_tex_zone(text: str, zone_name: str, zone_content: str) -> str:
     """
     Écrit du contenu dans une zone LaTeX délimitée.
@@ -500,7 +579,7 @@ def parse_tex_command(line: str) -> Optional[Dict[str, Any]]:
         return None
 
     # Cherche une commande \Nom{...}{...}...
-    m = re.match(r"\\(?P<name>[A-Za-z@]+)", stripped)
+    m = _RE_COMMAND_CALL.match(stripped)
     if not m:
         return None
 
@@ -560,16 +639,12 @@ def parse_tex_command_declaration(line: str) -> Optional[Dict[str, Any]]:
     if stripped.startswith("%"):
         return None
 
+    m = _RE_COMMAND_DECLARATION.match(line)
+    if not m:
+        return None
+
     # --- Cas newcommand / renewcommand (+ variantes x et *)
-    pat_cmdx = re.compile(
-        r"\\(?P<decl>(?:new|renew)commandx?\*?)\s*"
-        r"\{\\(?P<name>[A-Za-z@]+)\}"
-        r"(?:\[(?P<args>\d+)\])?"  # nb d’args
-        r"(?:\[(?P<opt_spec>[^\]]*)\])?"  # spec optionnelle (newcommandx)
-        r"\{"
-    )
-    m = pat_cmdx.search(line)
-    if m:
+    if m.group("decl"):
         n = int(m.group("args")) if m.group("args") else 0
         flags = [True] * n
         opt_spec = m.group("opt_spec")
@@ -601,29 +676,22 @@ def parse_tex_command_declaration(line: str) -> Optional[Dict[str, Any]]:
         }
 
     # --- Cas def / gdef / edef / xdef
-    pat_def = re.compile(
-        r"\\(?P<decl>[egx]?def)\s*\\(?P<name>[A-Za-z@]+)" r"(?P<sig>(?:#\d+)*)\s*\{"
-    )
-    m = pat_def.search(line)
-    if m:
-        indices = re.findall(r"#(\d+)", m.group("sig") or "")
-        n_args = int(max(indices)) if indices else 0
-        flags = [True] * n_args
-        value = _extract_braced_value(line, m.end() - 1)
-        # Même comportement pour def/gdef/... : ignorer si corps vide
-        if not value or not value.strip():
-            return None
-
-        return {
-            "decl": m.group("decl"),
-            "name": m.group("name"),
-            "value": value,
-            "options": None,
-            "args": n_args,
-            "required": flags,
-        }
+    indices = re.findall(r"#(\d+)", m.group("sig") or "")
+    n_args = int(max(indices)) if indices else 0
+    flags = [True] * n_args
+    value = _extract_braced_value(line, m.end() - 1)
+    # Même comportement pour def/gdef/... : ignorer si corps vide
+    if not value or not value.strip():
+        return None
 
-    return None
+    return {
+        "decl": m.group("def_decl"),
+        "name": m.group("def_name"),
+        "value": value,
+        "options": None,
+        "args": n_args,
+        "required": flags,
+    }
 
 
 def parse_package_import(line: str) -> Optional[Dict[str, Any]]:
@@ -649,10 +717,7 @@ def parse_package_import(line: str) -> Optional[Dict[str, Any]]:
         return None
 
     # Regex: decl (usepackage|RequirePackage), options optional, {names}
-    m = re.search(
-        r"\\(?P<decl>usepackage|RequirePackage)\s*(?:\[(?P<opts>[^]]*)\])?\s*\{(?P<name>[^}]*)\}",
-        line,
-    )
+    m = _RE_PACKAGE_IMPORT.search(line)
     if not m:
         return None
 
@@ -685,16 +750,15 @@ def parse_package_imports(content: str) -> List[str]:
     - Imports multiples : \\usepackage{pkgA,pkgB}
     - Chemins : \\usepackage{Dummy/Path/UPSTI_Document} -> UPSTI_Document
     """
-    pat = re.compile(r"\\(?:usepackage|RequirePackage)\s*(?:\[[^\]]*\])?\s*\{([^}]*)\}")
     packages: List[str] = []
-    for m in pat.findall(content):
+    for m in _RE_PACKAGE_NAMES.findall(content):
         for raw in m.split(','):
             raw = raw.strip()
             if not raw:
                 continue
-            # Normaliser séparateurs de chemin
-            base = raw.replace('/', '\\').split('\\')[-1]
-            packages.append(base)
+            # Ne garder que le nom de base (séparateurs / ou \)
+            idx = max(raw.rfind('/'), raw.rfind('\\'))
+            packages.append(raw[idx + 1 :] if idx >= 0 else raw)
     return packages
 
 
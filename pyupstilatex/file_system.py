@@ -1,12 +1,398 @@
+import codecs
+import errno
+import io
+import os
+import stat
+import sys
+import tempfile
 from dataclasses import dataclass, field
+from enum import IntFlag
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from .cache import LRUCache, file_identity, is_settled
 from .exceptions import DocumentParseError
-from .file_helpers import check_path_readable, check_path_writable
+from .file_helpers import check_path_writable
+
+# Taille de l'échantillon lu pour la détection binaire/encodage
+# (même taille que le tampon de lecture de TextIOWrapper)
+_SAMPLE_SIZE = 8192
+
+# Ouverture en lecture seule, binaire (Windows), non héritée par les
+# processus enfants et non bloquante (POSIX : un tube nommé *.tex ne bloque
+# pas la sonde, sans effet sur un fichier régulier) ; os.pread n'existe pas
+# sous Windows
+_OPEN_FLAGS = (
+    os.O_RDONLY
+    | getattr(os, "O_BINARY", 0)
+    | getattr(os, "O_CLOEXEC", 0)
+    | getattr(os, "O_NONBLOCK", 0)
+)
+_HAS_PREAD = hasattr(os, "pread")
+
+# Extensions acceptées, avec les casses usuelles pour éviter .lower()
+_TEX_SUFFIXES = frozenset((".tex", ".ltx", ".TEX", ".LTX", ".Tex", ".Ltx"))
+
+# Instances sans __dict__ (dataclass(slots=True) n'existe qu'à partir de 3.10)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Erreurs de création ou de renommage d'un fichier dans le dossier du
+# document, pour lesquelles l'écriture atomique est remplacée par une
+# écriture directe (voir _atomic_write_text) ; sous Windows, un fichier
+# ouvert par un autre programme donne une violation de partage
+_REPLACE_REFUSED_ERRNOS = frozenset((errno.EACCES, errno.EPERM, errno.EXDEV))
+_WINERROR_SHARING_VIOLATION = 32
+
+
+# Octets « texte » : tabulation, fins de ligne, saut de page, ASCII
+# imprimable et tous les octets >= 0x80 (UTF-8, latin-1). Les autres octets
+# de contrôle sont comptés en une passe C : len(sample.translate(None, ...))
+_TEXT_BYTES = bytes((9, 10, 12, 13)) + bytes(range(32, 127)) + bytes(range(128, 256))
+# Proportion d'octets de contrôle au-delà de laquelle le fichier est binaire
+_BINARY_RATIO = 0.30
+
+
+def _classify_sample(
+    sample: bytes, final: bool
+) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Classe un échantillon de fichier : binaire, ou texte avec son encodage.
+
+    En une seule analyse de l'échantillon déjà lu (sans rouvrir le fichier) :
+    1. octet nul, ou plus de 30 % d'octets de contrôle -> fichier binaire
+       (les fichiers UTF-16/UTF-32 en font partie : les handlers écrivent en
+       UTF-8) ;
+    2. UTF-8 valide -> texte UTF-8 ;
+    3. sinon -> fallback latin-1 (warning), comme check_path_readable.
+
+    Paramètres
+    ----------
+    sample : bytes
+        Premiers octets du fichier.
+    final : bool
+        True si l'échantillon contient tout le fichier (un caractère multi-octets
+        tronqué en fin d'échantillon est alors une erreur).
+
+    Retourne
+    --------
+    Tuple[Optional[str], Optional[str], Optional[str]]
+        (encoding, raison, flag) :
+        - (None, None, None) pour de l'UTF-8 ;
+        - ("latin-1", message, "warning") pour le fallback latin-1 ;
+        - (None, "Fichier binaire détecté", "fatal_error") pour un binaire.
+    """
+    # Présence d'un octet nul, ou trop d'octets de contrôle => binaire
+    if b"\x00" in sample or (
+        sample
+        and len(sample.translate(None, _TEXT_BYTES)) > _BINARY_RATIO * len(sample)
+    ):
+        return None, "Fichier binaire détecté", "fatal_error"
+
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=final)
+    except UnicodeDecodeError:
+        return "latin-1", "Fichier lu en latin-1 (fallback d'encodage)", "warning"
+    return None, None, None
+
+
+def _is_regular_file(path: str, dir_entry: Optional[os.DirEntry] = None) -> bool:
+    """Indique si le chemin désigne un fichier régulier (un seul stat).
+
+    Paramètres
+    ----------
+    path : str
+        Chemin à tester.
+    dir_entry : os.DirEntry, optional
+        Entrée os.scandir du chemin : son type, déjà connu grâce au parcours
+        du dossier, évite le stat.
+
+    Retourne
+    --------
+    bool
+        True si le chemin existe et est un fichier régulier, False sinon.
+    """
+    try:
+        if dir_entry is not None:
+            return dir_entry.is_file()
+        return stat.S_ISREG(os.stat(path).st_mode)
+    except (OSError, ValueError):
+        return False
+
+
+def _is_replace_refused(error: OSError) -> bool:
+    """Indique si error refuse la création ou le renommage (fonction interne).
+
+    Voir _atomic_write_text : seules ces erreurs justifient de réécrire le
+    fichier directement.
+    """
+    return (
+        error.errno in _REPLACE_REFUSED_ERRNOS
+        or getattr(error, "winerror", None) == _WINERROR_SHARING_VIOLATION
+    )
+
+
+def _atomic_write_text(path: Path, content: str, encoding: str) -> None:
+    """Remplace le contenu d'un fichier de façon atomique.
+
+    Le contenu est écrit dans un fichier temporaire du même dossier, synchronisé
+    sur le disque, puis substitué au fichier avec os.replace : en cas d'arrêt
+    brutal, le fichier contient l'ancienne ou la nouvelle version, jamais un
+    mélange tronqué. Les permissions du fichier sont conservées, et un lien
+    symbolique reste un lien (c'est sa cible qui est remplacée).
+
+    Si le fichier temporaire ne peut pas être créé ou substitué (dossier non
+    modifiable, fichier verrouillé sous Windows, ...), le fichier est réécrit
+    directement comme avec Path.write_text. Toute autre erreur (disque plein,
+    erreur d'entrée/sortie, erreur d'encodage, ...) laisse le fichier intact.
+
+    Paramètres
+    ----------
+    path : Path
+        Fichier à écrire.
+    content : str
+        Contenu à écrire.
+    encoding : str
+        Encodage à utiliser.
+
+    Raises
+    ------
+    OSError, UnicodeError
+        Si l'écriture a échoué.
+    """
+    target = os.path.realpath(path)
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(target),
+            prefix=f".{os.path.basename(target)}.",
+            suffix=".tmp",
+        )
+    except OSError as e:
+        if not _is_replace_refused(e):
+            raise
+        path.write_text(content, encoding=encoding)
+        return
+
+    try:
+        # Même traduction des fins de ligne que Path.write_text
+        with open(fd, "w", encoding=encoding) as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(target).st_mode))
+        except FileNotFoundError:
+            pass
+        try:
+            os.replace(tmp_path, target)
+            tmp_path = None
+        except OSError as e:
+            if not _is_replace_refused(e):
+                raise
+            path.write_text(content, encoding=encoding)
+    finally:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
 
 
-@dataclass
+def _check_writable(source: str, exists: bool) -> Tuple[bool, Optional[str]]:
+    """Vérifie une seule fois l'écritabilité d'un fichier.
+
+    Paramètres
+    ----------
+    source : str
+        Chemin du fichier.
+    exists : bool
+        Résultat de la vérification d'existence déjà faite : si le fichier
+        n'existe pas, aucun appel système n'est fait.
+
+    Retourne
+    --------
+    tuple[bool, Optional[str]]
+        (modifiable, raison si non modifiable).
+    """
+    # Écriture : si le fichier existe on indique l'état,
+    # sinon on signale inexistant
+    if not exists:
+        return False, "Fichier inexistant"
+    # exists garantit un fichier régulier : un seul os.access suffit, le
+    # diagnostic complet n'est fait qu'en cas de refus
+    if os.access(source, os.W_OK):
+        return True, None
+    ok_w, reason_w, _ = check_path_writable(source)
+    return bool(ok_w), reason_w
+
+
+class _FileFlag(IntFlag):
+    """États d'un DocumentFile, regroupés dans un seul entier."""
+
+    PROBED = 1
+    EXISTS = 2
+    READABLE = 4
+    WRITABLE = 8
+    # Écritabilité vérifiée (sinon : inconnue, is_writable vaut False)
+    WRITABLE_CHECKED = 16
+    # Flag de lisibilité : 'warning' ou 'fatal_error'
+    WARNING = 32
+    FATAL = 64
+    # Écritabilité déjà traitée (vérifiée, ou inconnue si la sonde a échoué)
+    WRITABLE_PROBED = 128
+
+
+@dataclass(frozen=True)
+class _FileProbe:
+    """Résultat (immuable) des vérifications système d'un fichier."""
+
+    exists: Optional[bool] = None
+    readable: Optional[bool] = None
+    readable_reason: Optional[str] = None
+    readable_flag: Optional[str] = None
+    # Écritabilité non vérifiable (ouverture impossible) ; sinon elle est
+    # vérifiée à la demande par DocumentFile
+    writable_unknown: bool = False
+    read_encoding: Optional[str] = None
+
+
+# Cache des sondes, partagé par tout le processus. La clé contient l'identité
+# du fichier (voir file_identity) et son mode : toute modification du fichier
+# produit une nouvelle clé. Les fichiers absents ne sont pas mis en cache (ils
+# peuvent être créés entre deux instanciations), ni ceux modifiés trop
+# récemment (voir is_settled).
+_PROBE_CACHE: "LRUCache[_FileProbe]" = LRUCache(4096)
+
+
+# Cache des contenus lus sur disque, partagé par tout le processus et borné en
+# nombre total de caractères : les instances ne gardent que la clé (source,
+# identité du fichier, encodage), pas le texte, si bien que les contenus les
+# moins récemment utilisés sont libérés même si des DocumentFile les ayant lus
+# existent encore. Un fichier modifié trop récemment (voir is_settled) n'y
+# est pas mis : l'instance qui le lit garde alors son texte dans _raw.
+_CONTENT_CACHE: "LRUCache[str]" = LRUCache(32 * 1024 * 1024, weigh=len)
+
+
+def _probe_file_with_sample(
+    source: str,
+    p: Optional[Path] = None,
+    dir_entry: Optional[os.DirEntry] = None,
+    prefetched_stat: Optional[os.stat_result] = None,
+) -> Tuple[_FileProbe, Optional[Tuple[tuple, bytes]]]:
+    """Vérifie l'existence et la lisibilité d'un fichier.
+
+    Détecte les fichiers binaires et les problèmes d'encodage. Pour un
+    fichier .tex/.ltx existant, le résultat est mis en cache (voir
+    _PROBE_CACHE) : une nouvelle sonde du même fichier inchangé se limite
+    à un open et un fstat.
+
+    Paramètres
+    ----------
+    source : str
+        Chemin du fichier.
+    p : Optional[Path]
+        Path déjà construit pour source, s'il est disponible.
+    dir_entry : Optional[os.DirEntry]
+        Entrée os.scandir de source, si l'appelant parcourt un dossier.
+    prefetched_stat : Optional[os.stat_result]
+        Résultat d'un stat de source déjà fait par l'appelant : il donne le
+        type du fichier et permet de consulter le cache sans ouvrir le
+        fichier.
+
+    Retourne
+    --------
+    tuple[_FileProbe, Optional[tuple[tuple, bytes]]]
+        États du fichier, et l'échantillon lu avec l'identité du fichier
+        (voir file_identity) au moment de la lecture, pour
+        que read() n'ait pas à relire le début du fichier. L'échantillon vaut
+        None si rien n'a été lu (résultat en cache, fichier non tex, erreur).
+    """
+    if p is None:
+        p = Path(source)
+
+    # Refuse explicitement tout fichier qui n'est pas un .tex ou un .ltx
+    # (.lower() seulement si l'extension brute n'est pas déjà connue)
+    suffix = p.suffix
+    if suffix not in _TEX_SUFFIXES and suffix.lower() not in _TEX_SUFFIXES:
+        if prefetched_stat is not None:
+            exists = stat.S_ISREG(prefetched_stat.st_mode)
+        else:
+            exists = _is_regular_file(source, dir_entry)
+        probe = _FileProbe(
+            exists=exists,
+            readable=False,
+            readable_reason="Le fichier n'est pas un fichier tex",
+            readable_flag="fatal_error",
+        )
+        return probe, None
+
+    # Un seul open : l'échantillon sert à la fois à repérer les
+    # binaires et à déterminer l'encodage. Descripteur brut plutôt qu'un
+    # objet fichier : pas de BufferedReader à construire pour 8 Kio
+    # Stat déjà connu : un fichier inchangé est trouvé en cache sans open
+    if prefetched_stat is not None and is_settled(prefetched_stat):
+        st = prefetched_stat
+        cached = _PROBE_CACHE.get((source, *file_identity(st), st.st_mode))
+        if cached is not None:
+            return cached, None
+
+    exists = None
+    fd = None
+    try:
+        fd = os.open(p, _OPEN_FLAGS)
+        # Type du fichier via le descripteur déjà ouvert :
+        # pas de stat supplémentaire sur le chemin
+        st = os.fstat(fd)
+        exists = stat.S_ISREG(st.st_mode)
+        if stat.S_ISDIR(st.st_mode):
+            # os.open accepte un dossier sous POSIX, contrairement à open()
+            raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), str(p))
+        identity = file_identity(st)
+        cache_key = (source, *identity, st.st_mode)
+        settled = is_settled(st)
+        cached = _PROBE_CACHE.get(cache_key) if settled else None
+        if cached is not None:
+            return cached, None
+        if _HAS_PREAD:
+            sample = os.pread(fd, _SAMPLE_SIZE, 0)
+        else:
+            sample = os.read(fd, _SAMPLE_SIZE)
+    except (OSError, ValueError) as e:
+        # Impossible d'ouvrir en binaire -> on considèrera illisible
+        if exists is None:
+            exists = _is_regular_file(source, dir_entry)
+        probe = _FileProbe(
+            exists=exists,
+            readable=False,
+            readable_reason=f"Lecture binaire impossible: {e}",
+            readable_flag="fatal_error",
+            writable_unknown=True,
+        )
+        return probe, None
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+    # Binaire ou texte, et encodage à utiliser pour read() (un fichier vide
+    # est considéré lisible en UTF-8)
+    read_encoding, readable_reason, readable_flag = _classify_sample(
+        sample, len(sample) < _SAMPLE_SIZE
+    )
+    readable = readable_flag != "fatal_error"
+
+    # L'écritabilité n'est pas vérifiée ici : la plupart des appelants (scan)
+    # ne la consultent jamais, voir DocumentFile._ensure_writable_checked
+    probe = _FileProbe(
+        exists=exists,
+        readable=readable,
+        readable_reason=readable_reason,
+        readable_flag=readable_flag,
+        read_encoding=read_encoding,
+    )
+    if exists and settled:
+        _PROBE_CACHE.put(cache_key, probe)
+    return probe, (identity, sample)
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class DocumentFile:
     """Gestion des aspects système de fichiers d'un document.
 
@@ -21,28 +407,58 @@ class DocumentFile:
         Si True, lève des exceptions en cas de problème. Défaut : False.
     require_writable : bool, optional
         Si True (et strict=True), exige que le fichier soit modifiable. Défaut : False.
+    dir_entry : os.DirEntry, optional
+        Entrée du fichier obtenue avec os.scandir(parent). Les appelants qui
+        parcourent un dossier devraient la passer (dir_entry=entry) : le type
+        de fichier, déjà connu, évite alors un stat. Défaut : None.
+    prefetched_stat : os.stat_result, optional
+        Stat du fichier déjà obtenu par l'appelant (ex: entry.stat()) : si le
+        fichier n'a pas changé depuis une sonde précédente, son résultat est
+        repris sans ouvrir le fichier. Défaut : None.
     """
 
     source: str
     strict: bool = False
     require_writable: bool = False
-
-    # États du fichier
-    _file_exists: Optional[bool] = field(default=None, init=False)
-    _file_readable: Optional[bool] = field(default=None, init=False)
-    _file_readable_reason: Optional[str] = field(default=None, init=False)
-    _file_readable_flag: Optional[str] = field(default=None, init=False)
-    _file_writable: Optional[bool] = field(default=None, init=False)
-    _file_writable_reason: Optional[str] = field(default=None, init=False)
+    dir_entry: Optional[os.DirEntry] = field(default=None, repr=False, compare=False)
+    prefetched_stat: Optional[os.stat_result] = field(
+        default=None, repr=False, compare=False
+    )
+
+    # États du fichier (voir _FileFlag) ; les raisons (lecture, écriture) ne
+    # sont allouées que si l'une d'elles est renseignée
+    _flags: int = field(default=0, init=False)
+    _reasons: Optional[Tuple[Optional[str], Optional[str]]] = field(
+        default=None, init=False
+    )
     _read_encoding: Optional[str] = field(default=None, init=False)
+    # Contenu gardé par l'instance (modifié en mémoire, écrit par elle, ou lu
+    # juste après une modification du fichier) ; sinon le contenu lu sur
+    # disque est dans _CONTENT_CACHE, retrouvé grâce à _raw_key
     _raw: Optional[str] = field(default=None, init=False)
+    _raw_key: Optional[tuple] = field(default=None, init=False, repr=False)
+    _sample: Optional[Tuple[tuple, bytes]] = field(
+        default=None, init=False, repr=False
+    )
+    _path: Path = field(init=False, repr=False)
+    # Mémos de parent/stem/suffix : functools.cached_property exige un
+    # __dict__, absent avec les slots
+    _parent: Optional[Path] = field(default=None, init=False, repr=False)
+    _stem: Optional[str] = field(default=None, init=False, repr=False)
+    _suffix: Optional[str] = field(default=None, init=False, repr=False)
+    # Écritures différées (voir defer_writes) : encodage de l'écriture en
+    # attente dans _raw, ou None si rien n'est en attente
+    _defer_writes: bool = field(default=False, init=False, repr=False)
+    _pending_encoding: Optional[str] = field(default=None, init=False, repr=False)
 
     def __post_init__(self):
         """Initialise les états du fichier.
 
-        Vérifie l'existence, la lisibilité et l'écritabilité du fichier.
-        Détecte les fichiers binaires et les problèmes d'encodage.
-        En mode strict, lève des exceptions si les conditions ne sont pas remplies.
+        Les vérifications système (existence, lisibilité, écritabilité) sont
+        différées jusqu'au premier accès à un état du fichier : accéder à
+        path, stem, parent ou suffix ne déclenche aucun appel système.
+        En mode strict, elles sont faites immédiatement et lèvent des
+        exceptions si les conditions ne sont pas remplies.
 
         Raises
         ------
@@ -50,101 +466,100 @@ class DocumentFile:
             Si le fichier est introuvable, illisible ou non ouvrable en écriture
             en mode strict.
         """
-        try:
-            p = Path(self.source)
-            self._file_exists = p.is_file()
-
-            # Refuse explicitement tout fichier qui n'est pas un .tex ou un .ltx
-            if p.suffix.lower() not in [".tex", ".ltx"]:
-                self._file_readable = False
-                self._file_readable_reason = "Le fichier n'est pas un fichier tex"
-                self._file_readable_flag = "fatal_error"
-                # Écriture : si le fichier existe on indique l'état,
-                # sinon on signale inexistant
-                if self._file_exists:
-                    ok_w, reason_w, _ = check_path_writable(self.source)
-                    self._file_writable = bool(ok_w)
-                    self._file_writable_reason = reason_w
-                else:
-                    self._file_writable = False
-                    self._file_writable_reason = "Fichier inexistant"
+        self._path = Path(self.source)
+
+        if not self.strict:
+            return
+
+        self._ensure_probed()
+
+        # Mode strict : on lève des erreurs précises si accès impossible
+        flags = self._flags
+        if not flags & _FileFlag.EXISTS:
+            raise DocumentParseError(
+                f"Fichier introuvable ou non fichier: {self.source}"
+            )
+        if not flags & _FileFlag.READABLE:
+            raise DocumentParseError(
+                f"Fichier illisible: {self.source} — "
+                f"{self.readable_reason or 'raison inconnue'}"
+            )
+        if self.require_writable:
+            self._ensure_writable_checked()
+            flags = self._flags
+            if flags & _FileFlag.WRITABLE:
+                pass
+            elif flags & _FileFlag.WRITABLE_CHECKED:
+                raise DocumentParseError(
+                    f"Fichier non ouvrable en écriture: {self.source} "
+                    f"— {self.writable_reason or 'raison inconnue'}"
+                )
             else:
-                # Petit test heuristique pour repérer les binaires
-                try:
-                    with p.open("rb") as f:
-                        sample = f.read(4096)
-                except Exception as e:
-                    # Impossible d'ouvrir en binaire -> on considèrera illisible
-                    self._file_readable = False
-                    self._file_readable_reason = f"Lecture binaire impossible: {e}"
-                    self._file_readable_flag = "fatal_error"
-                    self._file_writable = None
-                    self._file_writable_reason = None
-                else:
-                    if not sample:
-                        # Fichier vide -> considérer lisible (UTF-8)
-                        is_binary = False
-                    else:
-                        # Seuil simple: présence d'un octet nul => binaire
-                        is_binary = b"\x00" in sample
-
-                    if is_binary:
-                        self._file_readable = False
-                        self._file_readable_reason = "Fichier binaire détecté"
-                        self._file_readable_flag = "fatal_error"
-                        # Écriture : on laisse l'état vérifié si possible
-                        if self._file_exists:
-                            ok_w, reason_w, _ = check_path_writable(self.source)
-                            self._file_writable = bool(ok_w)
-                            self._file_writable_reason = reason_w
-                        else:
-                            self._file_writable = False
-                            self._file_writable_reason = "Fichier inexistant"
-                    else:
-                        # Texte plausible -> faire la vérification d'encodage
-                        ok_r, reason_r, flag_r = check_path_readable(self.source)
-                        self._file_readable = bool(ok_r)
-                        self._file_readable_reason = reason_r
-                        self._file_readable_flag = flag_r
-                        if flag_r == "warning":
-                            # mémoriser l'encodage fallback pour read()
-                            self._read_encoding = "latin-1"
-                        # Écriture
-                        self._file_writable, self._file_writable_reason, _ = (
-                            check_path_writable(self.source)
-                            if self._file_exists
-                            else (False, "Fichier inexistant", "fatal_error")
-                        )
-
-            # Mode strict : on lève des erreurs précises si accès impossible
-            if self.strict:
-                if not self._file_exists:
-                    raise DocumentParseError(
-                        f"Fichier introuvable ou non fichier: {self.source}"
-                    )
-                if not self._file_readable:
-                    raise DocumentParseError(
-                        f"Fichier illisible: {self.source} — "
-                        f"{self._file_readable_reason or 'raison inconnue'}"
-                    )
-                if self.require_writable:
-                    if self._file_writable is True:
-                        pass
-                    elif self._file_writable is False:
-                        raise DocumentParseError(
-                            f"Fichier non ouvrable en écriture: {self.source} "
-                            f"— {self._file_writable_reason or 'raison inconnue'}"
-                        )
-                    else:
-                        raise DocumentParseError(
-                            f"Capacité d'écriture non vérifiable pour ce stockage: "
-                            f"{self.source}"
-                        )
-        except DocumentParseError:
-            raise
-        except Exception:
-            # Ne bloque jamais l'instanciation en cas d'erreur inattendue
-            pass
+                raise DocumentParseError(
+                    f"Capacité d'écriture non vérifiable pour ce stockage: "
+                    f"{self.source}"
+                )
+
+    def _ensure_probed(self) -> None:
+        """Vérifie l'état du fichier au premier besoin (méthode interne).
+
+        Vérifie l'existence et la lisibilité du fichier, détecte les fichiers
+        binaires et les problèmes d'encodage. L'écritabilité est vérifiée à
+        part, voir _ensure_writable_checked. Les appels suivants ne font rien.
+        """
+        if self._flags & _FileFlag.PROBED:
+            return
+        self._flags = _FileFlag.PROBED | _FileFlag.WRITABLE_PROBED
+
+        try:
+            probe, self._sample = _probe_file_with_sample(
+                self.source,
+                self._path,
+                self.dir_entry,
+                prefetched_stat=self.prefetched_stat,
+            )
+        except (OSError, ValueError):
+            # Erreur système inattendue : le fichier reste vu comme
+            # inexistant et illisible
+            return
+
+        flags = _FileFlag.PROBED
+        if probe.exists:
+            flags |= _FileFlag.EXISTS
+        if probe.readable:
+            flags |= _FileFlag.READABLE
+        if probe.writable_unknown:
+            flags |= _FileFlag.WRITABLE_PROBED
+        if probe.readable_flag == "warning":
+            flags |= _FileFlag.WARNING
+        elif probe.readable_flag == "fatal_error":
+            flags |= _FileFlag.FATAL
+        self._flags = flags
+        if probe.readable_reason:
+            self._reasons = (probe.readable_reason, None)
+        self._read_encoding = probe.read_encoding
+
+    def _ensure_writable_checked(self) -> None:
+        """Vérifie l'écritabilité du fichier au premier besoin (méthode interne).
+
+        Séparée de _ensure_probed : un parcours de dossier ne consulte jamais
+        is_writable et n'a pas à payer cette vérification. Les appels suivants
+        ne font rien.
+        """
+        self._ensure_probed()
+        if self._flags & _FileFlag.WRITABLE_PROBED:
+            return
+        self._flags |= _FileFlag.WRITABLE_PROBED
+
+        writable, writable_reason = _check_writable(
+            self.source, bool(self._flags & _FileFlag.EXISTS)
+        )
+        self._flags |= _FileFlag.WRITABLE_CHECKED
+        if writable:
+            self._flags |= _FileFlag.WRITABLE
+        if writable_reason:
+            readable_reason = self._reasons[0] if self._reasons else None
+            self._reasons = (readable_reason, writable_reason)
 
     # Propriétés d'accès simples
     @property
@@ -156,7 +571,8 @@ class DocumentFile:
         bool
             True si le fichier existe, False sinon.
         """
-        return bool(self._file_exists)
+        self._ensure_probed()
+        return bool(self._flags & _FileFlag.EXISTS)
 
     @property
     def is_readable(self) -> bool:
@@ -167,7 +583,8 @@ class DocumentFile:
         bool
             True si le fichier est lisible, False sinon.
         """
-        return bool(self._file_readable)
+        self._ensure_probed()
+        return bool(self._flags & _FileFlag.READABLE)
 
     @property
     def is_writable(self) -> bool:
@@ -178,7 +595,8 @@ class DocumentFile:
         bool
             True si le fichier est modifiable, False sinon.
         """
-        return bool(self._file_writable)
+        self._ensure_writable_checked()
+        return bool(self._flags & _FileFlag.WRITABLE)
 
     @property
     def readable_reason(self) -> Optional[str]:
@@ -189,7 +607,8 @@ class DocumentFile:
         str, optional
             Message d'erreur si le fichier n'est pas lisible, None sinon.
         """
-        return self._file_readable_reason
+        self._ensure_probed()
+        return self._reasons[0] if self._reasons else None
 
     @property
     def readable_flag(self) -> Optional[str]:
@@ -200,7 +619,12 @@ class DocumentFile:
         str, optional
             'warning', 'error' ou 'fatal_error', ou None si lisible.
         """
-        return self._file_readable_flag
+        self._ensure_probed()
+        if self._flags & _FileFlag.FATAL:
+            return "fatal_error"
+        if self._flags & _FileFlag.WARNING:
+            return "warning"
+        return None
 
     @property
     def writable_reason(self) -> Optional[str]:
@@ -211,7 +635,8 @@ class DocumentFile:
         str, optional
             Message d'erreur si le fichier n'est pas modifiable, None sinon.
         """
-        return self._file_writable_reason
+        self._ensure_writable_checked()
+        return self._reasons[1] if self._reasons else None
 
     @property
     def read_encoding(self) -> Optional[str]:
@@ -222,6 +647,7 @@ class DocumentFile:
         str, optional
             Encodage à utiliser (ex: 'latin-1'), ou None si UTF-8.
         """
+        self._ensure_probed()
         return self._read_encoding
 
     @property
@@ -233,7 +659,7 @@ class DocumentFile:
         Path
             Objet Path du fichier.
         """
-        return Path(self.source)
+        return self._path
 
     @property
     def parent(self) -> Path:
@@ -244,7 +670,9 @@ class DocumentFile:
         Path
             Dossier parent du fichier.
         """
-        return Path(self.source).parent
+        if self._parent is None:
+            self._parent = self._path.parent
+        return self._parent
 
     @property
     def stem(self) -> str:
@@ -255,7 +683,9 @@ class DocumentFile:
         str
             Nom du fichier sans extension.
         """
-        return Path(self.source).stem
+        if self._stem is None:
+            self._stem = self._path.stem
+        return self._stem
 
     @property
     def suffix(self) -> str:
@@ -266,7 +696,9 @@ class DocumentFile:
         str
             Extension du fichier avec le point (ex: '.tex').
         """
-        return Path(self.source).suffix
+        if self._suffix is None:
+            self._suffix = self._path.suffix
+        return self._suffix
 
     def check_file(self, mode: str = "read") -> tuple[bool, List[List[str]]]:
         """Vérifie l'état du fichier selon le mode demandé.
@@ -296,8 +728,11 @@ class DocumentFile:
                 ["Mode doit être 'read', 'write' ou 'exists'.", "fatal_error"]
             ]
 
+        self._ensure_probed()
+        flags = self._flags
+
         # Existence
-        if not self._file_exists:
+        if not flags & _FileFlag.EXISTS:
             return False, [["Fichier introuvable", "fatal_error"]]
 
         if mode == "exists":
@@ -306,13 +741,13 @@ class DocumentFile:
         # Mode lecture
         if mode == "read":
             # readable_flag may be 'warning' when latin-1 fallback used
-            if self._file_readable:
-                if self._file_readable_flag == "warning":
+            if flags & _FileFlag.READABLE:
+                if flags & _FileFlag.WARNING:
                     return (
                         True,
                         [
                             [
-                                self._file_readable_reason
+                                self.readable_reason
                                 or "Fichier lu avec fallback d'encodage",
                                 "warning",
                             ]
@@ -321,20 +756,22 @@ class DocumentFile:
                 return True, []
             return False, [
                 [
-                    self._file_readable_reason or "Impossible de lire",
-                    self._file_readable_flag or "error",
+                    self.readable_reason or "Impossible de lire",
+                    self.readable_flag or "error",
                 ]
             ]
 
         # Mode écriture
-        if self._file_writable is True:
+        self._ensure_writable_checked()
+        flags = self._flags
+        if flags & _FileFlag.WRITABLE:
             return True, []
-        if self._file_writable is False:
+        if flags & _FileFlag.WRITABLE_CHECKED:
             return (
                 False,
                 [
                     [
-                        self._file_writable_reason or "Impossible d'ouvrir en écriture",
+                        self.writable_reason or "Impossible d'ouvrir en écriture",
                         "fatal_error",
                     ]
                 ],
@@ -344,18 +781,86 @@ class DocumentFile:
             False,
             [
                 [
-                    self._file_writable_reason
+                    self.writable_reason
                     or "Capacité d'écriture non vérifiable pour ce stockage",
                     "warning",
                 ]
             ],
         )
 
+    def read_header(self, nbytes: int = _SAMPLE_SIZE) -> Tuple[str, bool]:
+        """Lit et retourne le début du fichier, sans lire le reste.
+
+        Si le contenu complet est déjà en mémoire, il est retourné tel quel.
+        Sinon, seuls les nbytes premiers octets sont lus (l'échantillon de la
+        sonde est réutilisé s'il est toujours valide) et décodés avec
+        l'encodage détecté ; le texte est coupé après la dernière ligne
+        complète. Le contenu n'est pas mis en cache.
+
+        Paramètres
+        ----------
+        nbytes : int, optional
+            Nombre d'octets à lire. Défaut : 8192.
+
+        Retourne
+        --------
+        tuple[str, bool]
+            (texte, complet) : complet vaut True si le texte est le contenu
+            entier du fichier.
+
+        Raises
+        ------
+        DocumentParseError
+            Si la lecture échoue.
+        """
+        if self._raw is not None:
+            return self._raw, True
+        if self._raw_key is not None:
+            raw = _CONTENT_CACHE.get(self._raw_key)
+            if raw is not None:
+                return raw, True
+
+        self._ensure_probed()
+        try:
+            encoding = self._read_encoding or "utf-8"
+            with self._path.open("rb") as f:
+                # L'échantillon de la sonde suffit si le fichier ouvert est
+                # toujours celui qui a été sondé
+                data = None
+                if self._sample is not None:
+                    st = os.fstat(f.fileno())
+                    identity, sample = self._sample
+                    if identity == file_identity(st) and (
+                        len(sample) >= nbytes or len(sample) == st.st_size
+                    ):
+                        data = sample[:nbytes]
+                        complete = len(data) == st.st_size
+                if data is None:
+                    data = f.read(nbytes)
+                    complete = len(data) < nbytes
+            # Mêmes conversions de fins de ligne que read()
+            decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder(encoding)(errors="strict"),
+                translate=True,
+            )
+            text = decoder.decode(data, final=complete)
+        except Exception as e:
+            raise DocumentParseError(f"Unable to read source {self.source}: {e}")
+        if not complete:
+            text = text[: text.rfind("\n") + 1]
+        return text, complete
+
     def read(self) -> str:
         """Lit et retourne le contenu du fichier.
 
         Utilise l'encodage détecté (UTF-8 ou fallback latin-1).
-        Le contenu est mis en cache après la première lecture.
+        Le contenu est mis en cache après la première lecture, dans un cache
+        partagé et borné (_CONTENT_CACHE) : s'il en a été évincé, le fichier
+        est relu. Un fichier qui vient d'être modifié (voir is_settled) n'est
+        pas partagé : son contenu est gardé par l'instance. Si le fichier n'a
+        pas changé depuis la sonde, l'échantillon déjà lu est décodé
+        directement et seule la suite du fichier est lue.
+        Un contenu modifié en mémoire (_raw) est prioritaire.
 
         Retourne
         --------
@@ -367,14 +872,45 @@ class DocumentFile:
         DocumentParseError
             Si la lecture échoue.
         """
-        if self._raw is None:
-            try:
-                p = Path(self.source)
-                encoding = self._read_encoding or "utf-8"
-                self._raw = p.read_text(encoding=encoding, errors="strict")
-            except Exception as e:
-                raise DocumentParseError(f"Unable to read source {self.source}: {e}")
-        return self._raw
+        if self._raw is not None:
+            return self._raw
+        if self._raw_key is not None:
+            raw = _CONTENT_CACHE.get(self._raw_key)
+            if raw is not None:
+                return raw
+
+        self._ensure_probed()
+        try:
+            encoding = self._read_encoding or "utf-8"
+            sample, self._sample = self._sample, None
+            with self._path.open("rb") as f:
+                st = os.fstat(f.fileno())
+                identity = file_identity(st)
+                key = (self.source, *identity, encoding)
+                # Fichier modifié trop récemment : pas de partage entre
+                # instances (un contenu différent peut avoir la même clé)
+                settled = is_settled(st)
+                raw = _CONTENT_CACHE.get(key) if settled else None
+                if raw is None:
+                    # Mêmes conversions de fins de ligne que Path.read_text
+                    decoder = io.IncrementalNewlineDecoder(
+                        codecs.getincrementaldecoder(encoding)(errors="strict"),
+                        translate=True,
+                    )
+                    head = ""
+                    if sample is not None and sample[0] == identity:
+                        head = decoder.decode(sample[1])
+                        f.seek(len(sample[1]))
+                    raw = head + decoder.decode(f.read(), final=True)
+                    if settled:
+                        _CONTENT_CACHE.put(key, raw)
+        except Exception as e:
+            raise DocumentParseError(f"Unable to read source {self.source}: {e}")
+        if settled:
+            self._raw_key = key
+        else:
+            self._raw = raw
+        return raw
 
     def write(
         self, content: str, encoding: str = "utf-8"
@@ -392,6 +928,11 @@ class DocumentFile:
         --------
         tuple[bool, List[List[str]]]
             (succès, messages)
+
+        Notes
+        -----
+        Entre defer_writes() et flush(), le contenu est seulement gardé en
+        mémoire : il sera écrit une seule fois par flush().
         """
         try:
             # Vérifier que le fichier est modifiable
@@ -403,13 +944,61 @@ class DocumentFile:
                     ]
                 ]
 
-            # Écrire le fichier
-            Path(self.source).write_text(content, encoding=encoding)
+            if self._defer_writes:
+                # Écriture différée : les lectures suivantes voient ce contenu
+                self._raw = content
+                self._pending_encoding = encoding
+                return True, []
+
+            # Écrire le fichier (atomiquement : voir _atomic_write_text)
+            _atomic_write_text(self._path, content, encoding)
 
-            # Invalider le cache de lecture
+            # Oublier le contenu en mémoire
             self._raw = None
+            self._raw_key = None
+            self._sample = None
+
+            # L'instance garde le texte écrit (le fichier vient d'être modifié :
+            # pas de cache partagé, voir is_settled) : pas de relecture du
+            # fichier juste écrit. Seulement si read() le décoderait avec le
+            # même encodage
+            if encoding == (self._read_encoding or "utf-8"):
+                if "\r" in content:
+                    # Fins de ligne telles que read() les renverrait
+                    content = content.replace("\r\n", "\n").replace("\r", "\n")
+                self._raw = content
 
             return True, []
 
         except Exception as e:
             return False, [[f"Erreur lors de l'écriture du fichier : {e}", "error"]]
+
+    def defer_writes(self) -> None:
+        """Diffère les écritures jusqu'au prochain flush().
+
+        Les appels à write() ne font alors que garder le contenu en mémoire :
+        une suite de modifications (ex: plusieurs métadonnées) n'écrit le
+        fichier qu'une fois.
+        """
+        self._defer_writes = True
+
+    def flush(self) -> tuple[bool, List[List[str]]]:
+        """Écrit le contenu en attente et termine le mode différé.
+
+        Retourne
+        --------
+        tuple[bool, List[List[str]]]
+            (succès, messages) de l'écriture ; (True, []) si rien n'était en
+            attente. En cas d'échec, le contenu en attente est abandonné : les
+            lectures suivantes relisent le fichier.
+        """
+        self._defer_writes = False
+        encoding = self._pending_encoding
+        if encoding is None:
+            return True, []
+        self._pending_encoding = None
+        success, messages = self.write(self._raw, encoding)
+        if not success:
+            self._raw = None
+            self._raw_key = None
+        return success, messages
@@ -7,23 +7,293 @@ spécifiques à chaque version de document :
 - Version du package LaTeX (upsti-latex, UPSTI_Document, ...) : fonctionnalités LaTeX
 """
 
+import copy
+import hashlib
+import re
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import yaml
 
 from .accessibilite import VERSIONS_ACCESSIBLES_DISPONIBLES
+from .cache import LRUCache
+from .config import load_config
 from .file_helpers import read_json_config
 from .file_latex_helpers import (
-    find_tex_entity,
     parse_metadata_tex,
     parse_metadata_yaml,
+    parse_tex_command,
+    parse_tex_command_declaration,
     read_tex_zone,
+    remove_comment_chars,
+    strip_comment_char,
     write_tex_zone,
 )
+from .yaml_compat import YamlDumper, YamlLoader
 
 if TYPE_CHECKING:
     from .document import UPSTILatexDocument
 
 
+# Motifs \UPSTImeta<key>{valeur} compilés, par clé de métadonnée
+_META_DELETE_PATTERNS: Dict[str, "re.Pattern[str]"] = {}
+
+
+def _meta_delete_pattern(key: str) -> "re.Pattern[str]":
+    """Motif de la ligne \\UPSTImeta<key>{valeur}, compilé une fois par clé."""
+    pattern = _META_DELETE_PATTERNS.get(key)
+    if pattern is None:
+        pattern = _META_DELETE_PATTERNS[key] = re.compile(
+            rf"\\UPSTImeta{re.escape(key)}\{{[^}}]*\}}\n?"
+        )
+    return pattern
+
+
+# Clé YAML simple en début de ligne (« cle: ... ») ; les mots que YAML 1.1
+# interprète comme booléen ou null ne sont pas des clés str
+_RE_YAML_TOP_LEVEL_KEY = re.compile(r"([A-Za-z_][\w.-]*)[ \t]*:(?:[ \t]|$)")
+_YAML_NON_STR_WORDS = frozenset(
+    "yes Yes YES no No NO true True TRUE false False FALSE "
+    "on On ON off Off OFF null Null NULL".split()
+)
+
+
+def _yaml_top_level_keys(raw_zone: str) -> Optional[List[Tuple[int, str]]]:
+    """Repère les clés de premier niveau d'une zone YAML (fonction interne).
+
+    Permet de modifier une seule clé sans parser ni réécrire tout le bloc.
+    Seuls les blocs simples sont reconnus : chaque ligne non vide en colonne 0
+    doit être un commentaire ou une clé « cle: » ; les lignes indentées
+    appartiennent à la clé qui précède. Les scalaires littéraux ou repliés
+    (« | », « > ») sont exclus : leur fin de ligne finale dépend de ce qui
+    les suit.
+
+    Paramètres
+    ----------
+    raw_zone : str
+        Contenu brut de la zone metadonnees_yaml (lignes préfixées par %).
+
+    Retourne
+    --------
+    List[Tuple[int, str]], optional
+        (indice de ligne, clé) pour chaque clé, ou None si le bloc n'est pas
+        assez simple (clé entre guillemets ou répétée, ancre, liste, flux,
+        scalaire littéral ou replié, ...) : il faut alors passer par le
+        parser YAML.
+    """
+    # Ancres et alias : retirer une clé pourrait casser un alias vers elle
+    if "&" in raw_zone or "*" in raw_zone:
+        return None
+
+    keys: List[Tuple[int, str]] = []
+    seen = set()
+    for i, line in enumerate(raw_zone.splitlines()):
+        line = strip_comment_char(line)
+        if not line.strip() or line[0] in " \t" or line[0] == "#":
+            continue
+        m = _RE_YAML_TOP_LEVEL_KEY.match(line)
+        if not m or m.group(1) in _YAML_NON_STR_WORDS or m.group(1) in seen:
+            return None
+        # Scalaire littéral ou replié (|, >, avec indicateurs de fin de ligne
+        # et d'indentation éventuels : |-, >+2, ...)
+        if line[m.end() :].lstrip().startswith(("|", ">")):
+            return None
+        seen.add(m.group(1))
+        keys.append((i, m.group(1)))
+    return keys
+
+
+# Séparateurs de lignes de str.splitlines()
+_LINE_BREAKS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+def _iter_lines_containing(content: str, needle: str) -> "Iterator[re.Match[str]]":
+    """Lignes de content contenant needle, sans découper tout le texte.
+
+    Chaque correspondance couvre une ligne entière, fin de ligne comprise,
+    exactement comme un élément de content.splitlines(keepends=True) : les
+    lignes qui ne contiennent pas needle sont sautées par le moteur de regex
+    et aucune liste de lignes n'est construite.
+
+    Paramètres
+    ----------
+    content : str
+        Texte à parcourir.
+    needle : str
+        Texte recherché (sans saut de ligne).
+
+    Retourne
+    --------
+    Iterator[re.Match[str]]
+        Correspondances, dans l'ordre du texte (start()/end() : bornes de la
+        ligne dans content).
+    """
+    breaks = re.escape(_LINE_BREAKS)
+    pattern = (
+        rf"(?<![^{breaks}])[^{breaks}]*{re.escape(needle)}[^{breaks}]*"
+        rf"(?:\r\n|[{breaks}])?"
+    )
+    return re.finditer(pattern, content)
+
+
+# Résultats de parse_metadata, partagés par tout le processus et indexés par
+# (parser, empreinte du contenu) : un contenu déjà analysé (même fichier relu,
+# ou documents identiques) n'est pas reparsé
+_PARSE_METADATA_CACHE: "LRUCache[tuple]" = LRUCache(128)
+
+
+def _parse_metadata_cached(
+    parser: Callable[[str], Tuple[Dict, List[List[str]]]],
+    content: str,
+    dependency: Optional[Tuple] = None,
+) -> Tuple[Dict, List[List[str]]]:
+    """Applique parser à content, avec mise en cache du résultat (fonction interne).
+
+    Paramètres
+    ----------
+    parser : Callable[[str], Tuple[Dict, List[List[str]]]]
+        Parser des métadonnées (parse_metadata_tex ou parse_metadata_yaml).
+    content : str
+        Contenu du document.
+    dependency : Tuple, optional
+        Objets dont dépend aussi le résultat (ex: configurations JSON et
+        générale) : une entrée n'est réutilisée que s'il s'agit des mêmes
+        objets, comparés un à un. Défaut : None.
+
+    Retourne
+    --------
+    Tuple[Dict, List[List[str]]]
+        Résultat du parser. Les appelants modifiant ce résultat (surcharge
+        des métadonnées), le cache en garde et en renvoie des copies.
+    """
+    key = _parse_metadata_key(parser, content)
+    entry = _PARSE_METADATA_CACHE.get(key)
+    if entry is not None and _same_dependency(entry[0], dependency):
+        return copy.deepcopy(entry[1])
+
+    result = parser(content)
+    _store_parse_metadata(parser, content, result, dependency)
+    return result
+
+
+def _same_dependency(cached: Optional[Tuple], current: Optional[Tuple]) -> bool:
+    """Indique si deux dépendances sont faites des mêmes objets (identité)."""
+    if cached is None or current is None:
+        return cached is current
+    return len(cached) == len(current) and all(
+        a is b for a, b in zip(cached, current)
+    )
+
+
+def _parse_metadata_key(
+    parser: Callable[[str], Tuple[Dict, List[List[str]]]], content: str
+) -> Tuple[str, bytes]:
+    """Clé de _PARSE_METADATA_CACHE : (nom du parser, empreinte du contenu)."""
+    digest = hashlib.blake2b(
+        content.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
+    return (parser.__name__, digest)
+
+
+def _store_parse_metadata(
+    parser: Callable[[str], Tuple[Dict, List[List[str]]]],
+    content: str,
+    result: Tuple[Dict, List[List[str]]],
+    dependency: Optional[Tuple] = None,
+) -> None:
+    """Enregistre (une copie de) result comme résultat de parser pour content.
+
+    Utilisé par _parse_metadata_cached, mais aussi après nos propres écritures
+    (fonction interne) : le contenu écrit, déjà relu pour contrôler la
+    modification, n'est pas reparsé à la prochaine lecture des métadonnées.
+    """
+    key = _parse_metadata_key(parser, content)
+    _PARSE_METADATA_CACHE.put(key, (dependency, copy.deepcopy(result)))
+
+
+def _parse_metadata_yaml_if_untouched(
+    content: str, new_content: str, key: str
+) -> Optional[Tuple[Dict, List[List[str]]]]:
+    """Relit new_content et vérifie que seule la clé key y a changé.
+
+    Contrôle des modifications ligne à ligne d'un bloc simple (fonction
+    interne) : toutes les autres clés doivent être relues à l'identique.
+
+    Paramètres
+    ----------
+    content : str
+        Contenu du document avant modification.
+    new_content : str
+        Contenu du document après modification.
+    key : str
+        Clé ajoutée ou retirée.
+
+    Retourne
+    --------
+    Tuple[Dict, List[List[str]]], optional
+        Résultat de parse_metadata_yaml pour new_content, ou None si une autre
+        clé a changé ou si l'un des deux contenus n'est pas lu sans erreur
+        (il faut alors réécrire tout le bloc).
+    """
+    before, before_errors = _parse_metadata_cached(parse_metadata_yaml, content)
+    after, after_errors = parse_metadata_yaml(new_content)
+    if before_errors or after_errors:
+        return None
+    if not isinstance(before, dict) or not isinstance(after, dict):
+        return None
+    before.pop(key, None)
+    if {k: v for k, v in after.items() if k != key} != before:
+        return None
+    return after, after_errors
+
+
+# Table métadonnée -> tex_key de la dernière configuration JSON vue, avec
+# cette configuration : (cfg, table). Calculée une fois par configuration
+# (read_json_config renvoie le même objet tant que les fichiers JSON ne
+# changent pas). Le tuple est remplacé d'un bloc : pas besoin de verrou
+_TEX_KEY_MAP_CACHE: Optional[Tuple[dict, Dict[str, Optional[str]]]] = None
+
+
+def _tex_key_map(cfg: dict) -> Dict[str, Optional[str]]:
+    """Associe chaque métadonnée définie dans cfg à son tex_key (fonction interne).
+
+    Paramètres
+    ----------
+    cfg : dict
+        Configuration JSON (voir read_json_config).
+
+    Retourne
+    --------
+    Dict[str, Optional[str]]
+        {clé: tex_key} pour chaque entrée de cfg["metadonnee"] ; tex_key vaut
+        None si la métadonnée n'en définit pas. Dictionnaire partagé, à ne
+        pas modifier.
+    """
+    global _TEX_KEY_MAP_CACHE
+
+    cached = _TEX_KEY_MAP_CACHE
+    if cached is not None and cached[0] is cfg:
+        return cached[1]
+
+    tex_keys: Dict[str, Optional[str]] = {}
+    for key, meta_config in cfg.get("metadonnee", {}).items():
+        if not meta_config or not isinstance(meta_config, dict):
+            continue
+        params = meta_config.get("parametres", {})
+        tex_keys[key] = params.get("tex_key") if isinstance(params, dict) else None
+
+    _TEX_KEY_MAP_CACHE = (cfg, tex_keys)
+    return tex_keys
+
+
 # =============================================================================
 # HANDLERS POUR LES VERSIONS PYUPSTILATEX
 # =============================================================================
@@ -37,6 +307,9 @@ class DocumentPyUpstiLatexVersionHandler(ABC):
     de génération de contenu.
     """
 
+    # Seul attribut des handlers : pas de __dict__ par instance
+    __slots__ = ("document",)
+
     def __init__(self, document: "UPSTILatexDocument"):
         """Initialise le handler avec une référence au document parent.
 
@@ -99,6 +372,8 @@ class HandlerPyUpstiLatexV1(DocumentPyUpstiLatexVersionHandler):
     sous forme de commandes personnalisées (\\UPSTImetaXXX{...}).
     """
 
+    __slots__ = ()
+
     def parse_metadata(self) -> Tuple[Optional[Dict], List[List[str]]]:
         """Parse les métadonnées depuis le contenu LaTeX.
 
@@ -109,7 +384,13 @@ class HandlerPyUpstiLatexV1(DocumentPyUpstiLatexVersionHandler):
         Tuple[Optional[Dict], List[List[str]]]
             Dictionnaire des métadonnées extraites et liste de messages.
         """
-        return parse_metadata_tex(self.document.content)
+        # Le résultat dépend aussi des configurations JSON et générale (mêmes
+        # objets tant que les fichiers ne changent pas, voir read_json_config
+        # et load_config)
+        cfg, _ = read_json_config()
+        return _parse_metadata_cached(
+            parse_metadata_tex, self.document.content, (cfg, load_config())
+        )
 
 
 class HandlerPyUpstiLatexV2(DocumentPyUpstiLatexVersionHandler):
@@ -119,6 +400,8 @@ class HandlerPyUpstiLatexV2(DocumentPyUpstiLatexVersionHandler):
     (front-matter) au début du fichier.
     """
 
+    __slots__ = ()
+
     def parse_metadata(self) -> Tuple[Optional[Dict], List[List[str]]]:
         """Parse les métadonnées depuis le front-matter YAML.
 
@@ -130,7 +413,7 @@ class HandlerPyUpstiLatexV2(DocumentPyUpstiLatexVersionHandler):
         Tuple[Optional[Dict], List[List[str]]]
             Dictionnaire des métadonnées extraites et liste de messages.
         """
-        return parse_metadata_yaml(self.document.content)
+        return _parse_metadata_cached(parse_metadata_yaml, self.document.content)
 
     def set_metadata(self, key: str, value: any) -> Tuple[bool, List[List[str]]]:
         """Ajoute une métadonnée dans le bloc YAML.
@@ -150,14 +433,13 @@ class HandlerPyUpstiLatexV2(DocumentPyUpstiLatexVersionHandler):
         errors: List[List[str]] = []
 
         try:
-            import yaml
-
+            # Contenu lu une seule fois : toute la méthode travaille sur ce
+            # texte (de même pour la zone, recherchée une seule fois)
             content = self.document.content
 
-            # Extraire le bloc YAML avec read_tex_zone
-            yaml_block = read_tex_zone(
-                content, "metadonnees_yaml", remove_comment_char=True
-            )
+            # Extraire le bloc YAML avec read_tex_zone (brut, puis sans %)
+            raw_zone = read_tex_zone(content, "metadonnees_yaml")
+            yaml_block = remove_comment_chars(raw_zone) if raw_zone else raw_zone
             if not yaml_block:
                 errors.append(
                     [
@@ -167,14 +449,22 @@ class HandlerPyUpstiLatexV2(DocumentPyUpstiLatexVersionHandler):
                 )
                 return False, errors
 
-            # Prétraiter le bloc YAML (comme dans parse_metadata_yaml)
-            yaml_block = yaml_block.expandtabs(4)
+            # Bloc simple : la clé est ajoutée à la fin de la zone, sans
+            # parser ni réécrire le reste (commentaires conservés)
+            top_level_keys = _yaml_top_level_keys(raw_zone)
+            metadata = None
+            if top_level_keys is not None:
+                existing = any(k == key for _, k in top_level_keys)
+            else:
+                # Prétraiter le bloc YAML (comme dans parse_metadata_yaml)
+                yaml_block = yaml_block.expandtabs(4)
 
-            # Parser le YAML
-            metadata = yaml.safe_load(yaml_block) or {}
+                # Parser le YAML
+                metadata = yaml.load(yaml_block, Loader=YamlLoader) or {}
+                existing = key in metadata
 
             # Vérifier si la clé existe déjà
-            if key in metadata:
+            if existing:
                 errors.append(
                     [
                         f"La métadonnée '{key}' existe déjà. "
@@ -184,24 +474,59 @@ class HandlerPyUpstiLatexV2(DocumentPyUpstiLatexVersionHandler):
                 )
                 return False, errors
 
-            # Ajouter la nouvelle métadonnée
-            metadata[key] = value
+            new_content = None
+            parsed = None
+            if top_level_keys is not None:
+                # Sérialiser la seule nouvelle métadonnée, ajoutée (avec les
+                # commentaires LaTeX) à la fin de la zone
+                new_yaml = yaml.dump(
+                    {key: value},
+                    Dumper=YamlDumper,
+                    allow_unicode=True,
+                    sort_keys=False,
+                )
+                new_yaml_commented = raw_zone + "\n"
+                new_yaml_commented += "\n".join(
+                    f"% {line}" for line in new_yaml.strip().split("\n")
+                )
+                new_content = write_tex_zone(
+                    content, "metadonnees_yaml", new_yaml_commented
+                )
 
-            # Reconstruire le YAML
-            new_yaml = yaml.dump(metadata, allow_unicode=True, sort_keys=False)
+                # Les autres clés doivent être relues à l'identique, sinon
+                # tout le bloc est réécrit
+                parsed = _parse_metadata_yaml_if_untouched(content, new_content, key)
+                if parsed is None:
+                    new_content = None
+
+            if new_content is None:
+                if metadata is None:
+                    yaml_block = yaml_block.expandtabs(4)
+                    metadata = yaml.load(yaml_block, Loader=YamlLoader) or {}
+
+                # Ajouter la nouvelle métadonnée et reconstruire le YAML
+                metadata[key] = value
+                new_yaml = yaml.dump(
+                    metadata, Dumper=YamlDumper, allow_unicode=True, sort_keys=False
+                )
 
-            # Ajouter les commentaires LaTeX
-            new_yaml_commented = "\n".join(
-                f"% {line}" for line in new_yaml.strip().split("\n")
-            )
+                # Ajouter les commentaires LaTeX
+                new_yaml_commented = "\n".join(
+                    f"% {line}" for line in new_yaml.strip().split("\n")
+                )
 
-            # Écrire dans la zone avec write_tex_zone
-            new_content = write_tex_zone(
-                content, "metadonnees_yaml", new_yaml_commented
-            )
+                # Écrire dans la zone avec write_tex_zone
+                new_content = write_tex_zone(
+                    content, "metadonnees_yaml", new_yaml_commented
+                )
 
             # Écrire le nouveau contenu
-            self.document.file.write(new_content)
+            written, _ = self.document.file.write(new_content)
+
+            # Ajout en fin de bloc simple : le contenu écrit a déjà été relu
+            # (contrôle ci-dessus), pas besoin de le reparser
+            if written and parsed is not None:
+                _store_parse_metadata(parse_metadata_yaml, new_content, parsed)
 
             # Mettre à jour le cache en place (préserve initial_value)
             if self.document._metadata is not None:
@@ -233,14 +558,13 @@ class HandlerPyUpstiLatexV2(DocumentPyUpstiLatexVersionHandler):
         errors: List[List[str]] = []
 
         try:
-            import yaml
-
+            # Contenu lu une seule fois : toute la méthode travaille sur ce
+            # texte (de même pour la zone, recherchée une seule fois)
             content = self.document.content
 
-            # Extraire le bloc YAML avec read_tex_zone
-            yaml_block = read_tex_zone(
-                content, "metadonnees_yaml", remove_comment_char=True
-            )
+            # Extraire le bloc YAML avec read_tex_zone (brut, puis sans %)
+            raw_zone = read_tex_zone(content, "metadonnees_yaml")
+            yaml_block = remove_comment_chars(raw_zone) if raw_zone else raw_zone
             if not yaml_block:
                 errors.append(
                     [
@@ -250,37 +574,83 @@ class HandlerPyUpstiLatexV2(DocumentPyUpstiLatexVersionHandler):
                 )
                 return False, errors
 
-            # Prétraiter le bloc YAML
-            yaml_block = yaml_block.expandtabs(4)
+            # Bloc simple avec d'autres clés : seules les lignes de la clé sont
+            # retirées, sans parser ni réécrire le reste (commentaires
+            # conservés). Le dernier cas (bloc vidé) passe par le parser, qui
+            # écrit un dictionnaire vide
+            top_level_keys = _yaml_top_level_keys(raw_zone)
+            new_content = None
+            parsed = None
+            if top_level_keys is not None and len(top_level_keys) > 1:
+                key_index = next((i for i, k in top_level_keys if k == key), None)
+                if key_index is None:
+                    errors.append([f"La métadonnée '{key}' n'existe pas.", "error"])
+                    return False, errors
+
+                # Lignes de la clé : sa ligne et les lignes indentées (ou
+                # vides) qui suivent, sans les lignes vides finales
+                raw_lines = raw_zone.splitlines(keepends=True)
+                end = key_index + 1
+                last = key_index
+                while end < len(raw_lines):
+                    line = strip_comment_char(raw_lines[end])
+                    if line.strip():
+                        if line[0] not in " \t":
+                            break
+                        last = end
+                    end += 1
+                del raw_lines[key_index : last + 1]
+                new_yaml_commented = "".join(raw_lines).rstrip("\n")
+                new_content = write_tex_zone(
+                    content, "metadonnees_yaml", new_yaml_commented
+                )
 
-            # Parser le YAML
-            metadata = yaml.safe_load(yaml_block) or {}
+                # Les autres clés doivent être relues à l'identique, sinon
+                # tout le bloc est réécrit
+                parsed = _parse_metadata_yaml_if_untouched(content, new_content, key)
+                if parsed is None:
+                    new_content = None
 
-            # Vérifier si la clé existe
-            if key not in metadata:
-                errors.append([f"La métadonnée '{key}' n'existe pas.", "error"])
-                return False, errors
+            if new_content is None:
+                # Prétraiter le bloc YAML
+                yaml_block = yaml_block.expandtabs(4)
 
-            # Supprimer la métadonnée
-            del metadata[key]
+                # Parser le YAML
+                metadata = yaml.load(yaml_block, Loader=YamlLoader) or {}
 
-            # Reconstruire le YAML
-            new_yaml = yaml.dump(metadata, allow_unicode=True, sort_keys=False)
+                # Vérifier si la clé existe
+                if key not in metadata:
+                    errors.append([f"La métadonnée '{key}' n'existe pas.", "error"])
+                    return False, errors
 
-            # Ajouter les commentaires LaTeX
-            new_yaml_commented = "\n".join(
-                f"% {line}" for line in new_yaml.strip().split("\n")
-            )
+                # Supprimer la métadonnée
+                del metadata[key]
 
-            # Écrire dans la zone avec write_tex_zone
-            new_content = write_tex_zone(
-                content, "metadonnees_yaml", new_yaml_commented
-            )
+                # Reconstruire le YAML
+                new_yaml = yaml.dump(
+                    metadata, Dumper=YamlDumper, allow_unicode=True, sort_keys=False
+                )
+
+                # Ajouter les commentaires LaTeX
+                new_yaml_commented = "\n".join(
+                    f"% {line}" for line in new_yaml.strip().split("\n")
+                )
+
+                # Écrire dans la zone avec write_tex_zone
+                new_content = write_tex_zone(
+                    content, "metadonnees_yaml", new_yaml_commented
+                )
 
             # Écrire le nouveau contenu
-            self.document.file.write(new_content)
+            written, _ = self.document.file.write(new_content)
 
-            # Invalider le cache
+            # Lignes retirées d'un bloc simple : le contenu écrit a déjà été
+            # relu (contrôle ci-dessus), pas besoin de le reparser
+            if written and parsed is not None:
+                _store_parse_metadata(parse_metadata_yaml, new_content, parsed)
+
+            # Invalider le cache (les métadonnées formatées seront recalculées
+            # à la prochaine lecture)
             self.document._metadata = None
 
             errors.append([f"Métadonnée '{key}' supprimée avec succès.", "info"])
@@ -305,6 +675,9 @@ class DocumentLatexVersionHandler(ABC):
     (upsti-latex, UPSTI_Document, EPB_Cours).
     """
 
+    # Seul attribut des handlers : pas de __dict__ par instance
+    __slots__ = ("document",)
+
     def __init__(self, document: "UPSTILatexDocument"):
         """Initialise le handler avec une référence au document parent.
 
@@ -406,6 +779,8 @@ class DocumentLatexVersionHandler(ABC):
 class HandlerLatexUpstiLatex(DocumentLatexVersionHandler):
     """Handler pour le package LaTeX upsti-latex."""
 
+    __slots__ = ()
+
     def get_package_name(self) -> str:
         return "upsti-latex"
 
@@ -413,6 +788,8 @@ class HandlerLatexUpstiLatex(DocumentLatexVersionHandler):
 class HandlerLatexUPSTIDocument(DocumentLatexVersionHandler):
     """Handler pour le package LaTeX UPSTI_Document."""
 
+    __slots__ = ()
+
     def get_package_name(self) -> str:
         return "UPSTI_Document"
 
@@ -426,14 +803,16 @@ class HandlerLatexUPSTIDocument(DocumentLatexVersionHandler):
         """
         try:
             content = self.document.content
-            parsed = find_tex_entity(content, "UPSTIlogoPageDeGarde", kind="command")
 
-            # parsed est une liste...
-            if parsed and len(parsed) > 0:
-                first_occurrence = parsed[0]
-                args = first_occurrence.get("args", [])
-                if args and len(args) > 0:
-                    return args[0].get("value")
+            # Première occurrence (même analyse que find_tex_entity, limitée
+            # aux lignes contenant la commande)
+            for m in _iter_lines_containing(content, "\\UPSTIlogoPageDeGarde"):
+                parsed = parse_tex_command(m.group(0).rstrip(_LINE_BREAKS))
+                if parsed and parsed.get("name") == "UPSTIlogoPageDeGarde":
+                    args = parsed.get("args", [])
+                    if args and len(args) > 0:
+                        return args[0].get("value")
+                    return None
 
             return None
         except Exception:
@@ -456,8 +835,6 @@ class HandlerLatexUPSTIDocument(DocumentLatexVersionHandler):
         str
             Bloc de déclarations \\newcommand, une par ligne.
         """
-        from .config import load_config
-
         cfg_generale = load_config()
         cfg_default_meta = cfg_generale.meta
 
@@ -574,9 +951,8 @@ class HandlerLatexUPSTIDocument(DocumentLatexVersionHandler):
                 )
                 return False, errors
 
-            cfg_meta = cfg.get("metadonnee", {})
-            meta_config = cfg_meta.get(key)
-            if not meta_config:
+            tex_keys = _tex_key_map(cfg)
+            if key not in tex_keys:
                 errors.append(
                     [
                         f"La métadonnée '{key}' n'est pas définie "
@@ -586,8 +962,7 @@ class HandlerLatexUPSTIDocument(DocumentLatexVersionHandler):
                 )
                 return False, errors
 
-            params = meta_config.get("parametres", {})
-            tex_key = params.get("tex_key")
+            tex_key = tex_keys[key]
             if not tex_key:
                 errors.append(
                     [
@@ -598,63 +973,46 @@ class HandlerLatexUPSTIDocument(DocumentLatexVersionHandler):
                 )
                 return False, errors
 
-            # 2. Vérifier si la commande existe déjà
+            # 2. Chercher la première déclaration existante (ligne non
+            # commentée) : seules les lignes contenant tex_key sont analysées,
+            # et le texte n'est pas découpé en lignes
             content = self.document.content
-            existing = find_tex_entity(content, tex_key, kind="command_declaration")
+            existing = None
+            for m in _iter_lines_containing(content, tex_key):
+                line_parsed = parse_tex_command_declaration(m.group(0))
+                if line_parsed and line_parsed.get("name") == tex_key:
+                    existing = m
+                    break
 
             # 3. Construire la nouvelle déclaration
             new_declaration = f"\\newcommand{{\\{tex_key}}}{{{value}}}\n"
 
-            if existing:
-                # La commande existe : on la remplace
-                # Trouver la ligne contenant cette déclaration
-                lines = content.splitlines(keepends=True)
-                new_lines = []
-                replaced = False
-
-                for line in lines:
-                    # Ignorer les lignes commentées
-                    stripped = line.lstrip()
-                    if stripped.startswith("%"):
-                        new_lines.append(line)
-                        continue
-
-                    # Vérifier si la ligne contient la déclaration
-                    line_parsed = find_tex_entity(
-                        line, tex_key, kind="command_declaration"
-                    )
-                    if line_parsed and not replaced:
-                        # Remplacer cette ligne
-                        new_lines.append(new_declaration)
-                        replaced = True
-                    else:
-                        new_lines.append(line)
-
-                new_content = "".join(new_lines)
+            if existing is not None:
+                # La commande existe : on remplace sa ligne
+                new_content = (
+                    content[: existing.start()]
+                    + new_declaration
+                    + content[existing.end() :]
+                )
                 message = f"Métadonnée '{key}' (\\{tex_key}) modifiée avec succès."
 
             else:
                 # La commande n'existe pas : on l'insère après \usepackage{...}}
-                lines = content.splitlines(keepends=True)
-                new_lines = []
-                inserted = False
-
-                for line in lines:
-                    new_lines.append(line)
-
-                    # Chercher \usepackage ou \RequirePackage{UPSTI_Document}
-                    if not inserted and not line.lstrip().startswith("%"):
-                        if "\\usepackage" in line or "\\RequirePackage" in line:
-                            if "UPSTI_Document" in line:
-                                # Insérer la nouvelle commande juste après
-                                new_lines.append(new_declaration)
-                                inserted = True
-
-                if not inserted:
-                    # Si on n'a pas trouvé le package, on insère en haut du fichier
-                    new_lines.insert(0, new_declaration)
-
-                new_content = "".join(new_lines)
+                # Si on ne trouve pas le package, on insère en haut du fichier
+                insert_pos = 0
+                for m in _iter_lines_containing(content, "UPSTI_Document"):
+                    # Chercher \usepackage ou \RequirePackage{UPSTI_Document} ; le
+                    # reste du fichier n'est pas parcouru
+                    line = m.group(0)
+                    if (
+                        "\\usepackage" in line or "\\RequirePackage" in line
+                    ) and not line.lstrip().startswith("%"):
+                        insert_pos = m.end()
+                        break
+
+                new_content = (
+                    content[:insert_pos] + new_declaration + content[insert_pos:]
+                )
                 message = f"Métadonnée '{key}' (\\{tex_key}) ajoutée avec succès."
 
             # 4. Écrire le nouveau contenu
@@ -693,20 +1051,18 @@ class HandlerLatexUPSTIDocument(DocumentLatexVersionHandler):
         errors: List[List[str]] = []
 
         try:
-            import re
-
             content = self.document.content
 
-            # Pattern pour trouver la ligne complète avec \UPSTImeta<key>{valeur}
-            pattern = rf"\\UPSTImeta{re.escape(key)}\{{[^}}]*\}}\n?"
-
-            if not re.search(pattern, content):
+            # Supprimer la ligne complète avec \UPSTImeta<key>{valeur}, en
+            # une seule passe (subn indique si elle existait). Recherche
+            # littérale d'abord : clé absente sans passer par la regex
+            count = 0
+            if f"\\UPSTImeta{key}{{" in content:
+                new_content, count = _meta_delete_pattern(key).subn("", content)
+            if not count:
                 errors.append([f"La métadonnée '{key}' n'existe pas.", "error"])
                 return False, errors
 
-            # Supprimer la ligne
-            new_content = re.sub(pattern, "", content)
-
             # Écrire le nouveau contenu
             self.document.file.write(new_content)
 
@@ -808,5 +1164,7 @@ class HandlerLatexUPSTIDocument(DocumentLatexVersionHandler):
 class HandlerLatexEPBCours(DocumentLatexVersionHandler):
     """Handler pour le package LaTeX EPB_Cours (ancien format, non supporté)."""
 
+    __slots__ = ()
+
     def get_package_name(self) -> str:
         return "EPB_Cours"
@@ -0,0 +1,15 @@
+"""Chargeur et émetteur YAML utilisés par le package.
+
+Versions C (libyaml) si PyYAML a été compilé avec, sinon leurs équivalents
+Python (mêmes résultats, 5 à 10 fois plus lents). Dans les deux cas, seuls
+les types YAML standards sont acceptés (Safe).
+"""
+
+try:
+    from yaml import CSafeDumper as YamlDumper
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeDumper as YamlDumper
+    from yaml import SafeLoader as YamlLoader
+
+__all__ = ["YamlDumper", "YamlLoader"]